@@ -0,0 +1,17 @@
+# Cluster policies, Airflow imports this file from $AIRFLOW_HOME/config.
+# Runs inside the scheduler: no database access, no heavy or project imports.
+
+# dag_run.conf key etl_sizing_dag triggers etl_pipeline_dag with (include.etl.sizing.RESOURCE_PLAN_CONF_KEY)
+RESOURCE_PLAN_CONF_KEY = "resource_plan"
+
+
+def task_instance_mutation_hook(task_instance, dag_run=None):
+    """
+    Route a task instance to the pool / pool_slots / queue its run's resource plan picked,
+    tasks are looked up by task_id without the TaskGroup prefix
+    """
+    if dag_run is None or not dag_run.conf:
+        return
+    resources = (dag_run.conf.get(RESOURCE_PLAN_CONF_KEY) or {}).get("resources", {})
+    for key, value in resources.get(task_instance.task_id.rsplit(".", 1)[-1], {}).items():
+        setattr(task_instance, key, value)
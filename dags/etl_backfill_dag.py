@@ -0,0 +1,140 @@
+from pathlib import Path
+
+from airflow.sdk import Param, TaskGroup, dag, task
+from pendulum import datetime
+
+from include.config_loader import load_config
+from include.logger import setup_logger
+
+# Same rule as etl_pipeline_dag: heavy imports stay inside the task bodies.
+CONFIG_PATH = Path(__file__).resolve().parent.parent / "include" / "config.yaml"
+
+config = load_config(str(CONFIG_PATH))
+
+logging = setup_logger("etl.backfill_dag")
+
+
+@dag(
+    start_date=datetime(2026, 1, 1),
+    schedule=None,
+    catchup=False,
+    tags=['exercise', 'backfill'],
+    params={
+        "start_date": Param("2026-01-01", type="string", format="date"),
+        "end_date": Param("2026-01-31", type="string", format="date"),
+    },
+)
+def etl_backfill_dag():
+    """
+    Backfill a range of logical dates in one run: the S3 folder is read once and the analytics
+    are computed for every date from running totals, written partitioned by logical date
+    """
+    @task()
+    def extract_data(bucket: str, folder: str, aws_conn_id: str) -> dict:
+        from include.etl.extract_data_s3 import extract_data_from_s3
+
+        return extract_data_from_s3(bucket=bucket, folder=folder, aws_conn_id=aws_conn_id)
+
+    @task(multiple_outputs=True)
+    def prepare_backfill_data(files: dict, end_date: str, dedup_config: dict,
+                              quarantine_config: dict, output_path: str, aws_conn_id: str) -> dict:
+        import pandas as pd
+        from include.etl.backfill import output_storage_options, sales_up_to, write_rejects
+        from include.etl.deduplicate import deduplicate_sales
+        from include.etl.engine import get_engine
+        from include.etl.quarantine import Quarantine
+
+        def get_file(name: str) -> pd.DataFrame:
+            for key, df in files.items():
+                if name in key:
+                    return df
+            raise ValueError(f"{name} file not found")
+
+        sales_dfs = [df for key, df in files.items() if "sales" in key]
+        if not sales_dfs:
+            raise ValueError("Sales file not found")
+
+        sales_df, _ = deduplicate_sales(pd.concat(sales_dfs, ignore_index=True),
+                                        key_columns=dedup_config["key_columns"])
+        engine = get_engine(config["engine"], config)
+        quarantines = {name: Quarantine.from_config(name, quarantine_config)
+                       for name in ("sales", "customers", "products")}
+        try:
+            sales_df = engine.clean_sales_data(sales_df, quarantine=quarantines["sales"])
+            customers_df = engine.clean_customers_data(get_file("customer"), quarantine=quarantines["customers"])
+            products_df = engine.clean_products_data(get_file("product"), quarantine=quarantines["products"])
+        finally:
+            # written before a reject ratio failure too, next to the analytics folders
+            storage_options = output_storage_options(output_path, aws_conn_id)
+            for name, quarantine in quarantines.items():
+                if quarantine is not None and quarantine.rejected_rows:
+                    write_rejects(quarantine.to_frame(), f"{output_path.rstrip('/')}/rejects/{name}.parquet",
+                                  storage_options)
+
+        # shipped once, the analytics derive every logical date from it
+        sales_df = sales_up_to(sales_df, end_date=end_date)
+        return {
+            "sales": sales_df.to_json(orient="split", date_format="iso"),
+            "customers": customers_df.to_json(orient="split", date_format="iso"),
+            "products": products_df.to_json(orient="split"),
+        }
+
+    @task()
+    def backfill_analytics_task(sales: str, customers: str, products: str, start_date: str, end_date: str,
+                                output_path: str, aws_conn_id: str) -> dict:
+        import pandas as pd
+        from include.etl.backfill import backfill_forecast_sales, \
+            backfill_monthly_aggregates, backfill_sales_anomalies, backfill_segment_customers, \
+            output_storage_options, write_partitioned
+        from include.etl.engine import get_engine
+
+        sales_df = pd.read_json(sales, orient="split")
+        if sales_df.empty:
+            logging.info("No sales in the backfill range, nothing to write")
+            return {}
+        customers_df = pd.read_json(customers, orient="split")
+        products_df = pd.read_json(products, orient="split")
+
+        engine = get_engine(config["engine"], config)
+        merged_df = engine.merge_data(sales_df=sales_df, customers_df=customers_df, products_df=products_df)
+        outputs = {
+            "monthly_sales": backfill_monthly_aggregates(merged_df, start_date, end_date),
+            "customer_segment": backfill_segment_customers(sales_df, customers_df, start_date, end_date),
+            "detect_sales_anomalies": backfill_sales_anomalies(sales_df, start_date, end_date),
+            "forecast_sales": backfill_forecast_sales(sales_df, end_date),
+        }
+
+        storage_options = output_storage_options(output_path, aws_conn_id)
+        for name, df in outputs.items():
+            if not df.empty:
+                write_partitioned(df, f"{output_path.rstrip('/')}/{name}", storage_options)
+        return {name: len(df) for name, df in outputs.items()}
+
+    with TaskGroup("extraction") as extraction:
+        files = extract_data(
+            bucket=config['s3']['bucket'],
+            folder=config['s3']['folder'],
+            aws_conn_id=config['aws_conn_id']
+        )
+
+    with TaskGroup("transform") as transform:
+        backfill_data = prepare_backfill_data(
+            files=files,
+            end_date="{{ params.end_date }}",
+            dedup_config=config["dedup"],
+            quarantine_config=config["quarantine"],
+            output_path=config["backfill"]["output_path"],
+            aws_conn_id=config["aws_conn_id"],
+        )
+
+    with TaskGroup("analytics") as analytics:
+        backfill_analytics_task(
+            backfill_data["sales"],
+            backfill_data["customers"],
+            backfill_data["products"],
+            start_date="{{ params.start_date }}",
+            end_date="{{ params.end_date }}",
+            output_path=config["backfill"]["output_path"],
+            aws_conn_id=config["aws_conn_id"],
+        )
+etl_backfill_dag()
@@ -1,36 +1,72 @@
-import pandas as pd
+from pathlib import Path
 
-from airflow.sdk import TaskGroup, dag, task
-from airflow.utils import yaml
+from airflow.sdk import Param, TaskGroup, dag, task
 from pendulum import datetime
 
-from include.etl.extract_data_s3 import extract_data_from_s3
-from include.etl.load_data import load_data_to_snowflake
-from include.etl.transform import clean_sales_data, clean_customers_data, clean_products_data, merge_data, \
-    compute_monthly_aggregates, segment_customers, detect_sales_anomalies, forecast_sales
+from include.config_loader import load_config
+from include.etl.sizing import RESOURCE_PLAN_CONF_KEY
+from include.logger import setup_logger
 
-with open("include/config.yaml", 'r') as file:
-    config = yaml.safe_load(file)
+# The scheduler re-parses this file constantly, so only light imports live at module level.
+# pandas, pandera and the provider hooks are imported inside the task bodies.
+CONFIG_PATH = Path(__file__).resolve().parent.parent / "include" / "config.yaml"
 
+config = load_config(str(CONFIG_PATH))
 
+logging = setup_logger("etl.pipeline_dag")
+
+
+# Triggered daily by etl_sizing_dag with this run's resource plan in the conf, pools and queues
+# are applied from it by the task_instance_mutation_hook in config/airflow_local_settings.py (no plan = defaults).
 @dag(
     start_date=datetime(2026, 1, 1),
-    schedule='@daily',
+    schedule=None,
     catchup=False,
     tags=['exercise'],
+    params={RESOURCE_PLAN_CONF_KEY: Param({}, type="object")},
 )
 def etl_pipeline_dag():
     @task()
     def extract_data(bucket: str, folder: str, aws_conn_id: str) -> dict:
-        return extract_data_from_s3(bucket=bucket, folder=folder, aws_conn_id=aws_conn_id)
+        from airflow.sdk import get_current_context
+        from include.etl.extract_data_s3 import extract_data_from_s3
+        from include.etl.sizing import SIZING_HISTORY_VARIABLE, load_variable, record_dataset_stats, save_variable
+
+        plan = get_current_context()["params"][RESOURCE_PLAN_CONF_KEY]
+        files = extract_data_from_s3(bucket=bucket, folder=folder, aws_conn_id=aws_conn_id)
+        if plan:
+            history = record_dataset_stats(load_variable(SIZING_HISTORY_VARIABLE), files, plan["input_bytes"])
+            save_variable(SIZING_HISTORY_VARIABLE, history)
+        return files
 
 
     @task()
     def get_sales_file(files: dict) -> str:
-        for key, df in files.items():
-            if "sales" in key:
-                return df.to_json(orient="split")
-        raise ValueError("Sales file not found")
+        import pandas as pd
+
+        # every sales file is kept, the dedup stage drops orders that arrive in more than one
+        sales_dfs = [df for key, df in files.items() if "sales" in key]
+        if not sales_dfs:
+            raise ValueError("Sales file not found")
+        return pd.concat(sales_dfs, ignore_index=True).to_json(orient="split")
+
+    @task(multiple_outputs=True)
+    def deduplicate_sales_task(sales_file: str, key_columns: list, lineage_config: dict) -> dict:
+        import time
+
+        import pandas as pd
+        from include.etl.deduplicate import deduplicate_sales
+        from include.etl.lineage import LineageLedger, push_entries
+
+        ledger = LineageLedger.from_config(lineage_config)
+        sales_df = pd.read_json(sales_file, orient="split")
+        started = time.perf_counter()
+        sales_df, report = deduplicate_sales(sales_df, key_columns=key_columns)
+        if ledger is not None:
+            ledger.record("deduplicate_sales", report["input_rows"], sales_df, started,
+                          filtered=report["dropped_in_batch"])
+        push_entries(ledger)
+        return {"sales": sales_df.to_json(orient="split"), "report": report}
 
     @task()
     def get_customers_file(files: dict) -> str:
@@ -47,84 +83,233 @@ def etl_pipeline_dag():
         raise ValueError("Product file not found")
 
     @task()
-    def transform_sales_data(sales_file: str) -> str:
+    def transform_sales_data(sales_file: str, quarantine_config: dict, lineage_config: dict) -> str:
+        import pandas as pd
+        from include.etl.engine import get_engine
+        from include.etl.lineage import LineageLedger, push_entries
+        from include.etl.quarantine import Quarantine, push_rejects
+
+        quarantine = Quarantine.from_config("sales", quarantine_config)
         sales_df = pd.read_json(sales_file, orient="split")
-        sales_df = clean_sales_data(sales_df)
+        ledger = LineageLedger.from_config(lineage_config)
+        engine = get_engine(config["engine"], config)
+        try:
+            sales_df = engine.clean_sales_data(sales_df, quarantine=quarantine, ledger=ledger)
+        finally:
+            # pushed before a reject ratio failure too, so load_*_rejects still writes what was quarantined
+            push_rejects(quarantine)
+        push_entries(ledger)
         return sales_df.to_json(orient="split", date_format="iso")
 
     @task()
-    def transform_customers_file(customers_file: str) -> str:
+    def transform_customers_file(customers_file: str, quarantine_config: dict, lineage_config: dict) -> str:
+        import pandas as pd
+        from include.etl.engine import get_engine
+        from include.etl.lineage import LineageLedger, push_entries
+        from include.etl.quarantine import Quarantine, push_rejects
+
+        quarantine = Quarantine.from_config("customers", quarantine_config)
         customers_df = pd.read_json(customers_file, orient="split")
-        customers_df = clean_customers_data(customers_df)
+        ledger = LineageLedger.from_config(lineage_config)
+        engine = get_engine(config["engine"], config)
+        try:
+            customers_df = engine.clean_customers_data(customers_df, quarantine=quarantine, ledger=ledger)
+        finally:
+            push_rejects(quarantine)
+        push_entries(ledger)
         return customers_df.to_json(orient="split", date_format="iso")
 
     @task()
-    def transform_product_file(products_file: str) -> str:
+    def transform_product_file(products_file: str, quarantine_config: dict, lineage_config: dict) -> str:
+        import pandas as pd
+        from include.etl.engine import get_engine
+        from include.etl.lineage import LineageLedger, push_entries
+        from include.etl.quarantine import Quarantine, push_rejects
+
+        quarantine = Quarantine.from_config("products", quarantine_config)
         product_df = pd.read_json(products_file, orient="split")
-        product_df = clean_products_data(product_df)
+        ledger = LineageLedger.from_config(lineage_config)
+        engine = get_engine(config["engine"], config)
+        try:
+            product_df = engine.clean_products_data(product_df, quarantine=quarantine, ledger=ledger)
+        finally:
+            push_rejects(quarantine)
+        push_entries(ledger)
         return product_df.to_json(orient="split",)
 
     @task()
-    def merged_data_task(transformed_sales: str, transformed_customers: str, transformed_products: str) -> str:
+    def merged_data_task(transformed_sales: str, transformed_customers: str, transformed_products: str,
+                         lineage_config: dict) -> str:
+        import pandas as pd
+        from include.etl.engine import get_engine
+        from include.etl.lineage import LineageLedger, push_entries
+
         sales_df = pd.read_json(transformed_sales, orient="split")
         customers_df = pd.read_json(transformed_customers, orient="split")
         products_df = pd.read_json(transformed_products, orient="split")
-        merged_df = merge_data(sales_df=sales_df, customers_df=customers_df, products_df=products_df)
+        ledger = LineageLedger.from_config(lineage_config)
+        engine = get_engine(config["engine"], config)
+        merged_df = engine.merge_data(sales_df=sales_df, customers_df=customers_df, products_df=products_df, ledger=ledger)
+        push_entries(ledger)
         return merged_df.to_json(orient="split")
 
     @task()
-    def aggregated_data_task(merged_data: str) -> str:
+    def aggregated_data_task(merged_data: str, lineage_config: dict) -> str:
+        import pandas as pd
+        from include.etl.engine import get_engine
+        from include.etl.lineage import LineageLedger, push_entries
+
+        ledger = LineageLedger.from_config(lineage_config)
         merged_df = pd.read_json(merged_data, orient="split")
-        aggregated_df = compute_monthly_aggregates(merged_df=merged_df)
+        engine = get_engine(config["engine"], config)
+        aggregated_df = engine.compute_monthly_aggregates(merged_df=merged_df, ledger=ledger)
+        push_entries(ledger)
         return aggregated_df.to_json(orient="split", date_format="iso")
 
     @task()
-    def segment_customers_task(sales: str, customers: str) -> str:
+    def segment_customers_task(sales: str, customers: str, lineage_config: dict) -> str:
+        import pandas as pd
+        from include.etl.engine import get_engine
+        from include.etl.lineage import LineageLedger, push_entries
+
+        ledger = LineageLedger.from_config(lineage_config)
         sales_df = pd.read_json(sales, orient="split")
         customers_df = pd.read_json(customers, orient="split")
-        segmented_df = segment_customers(sales_df, customers_df)
+        engine = get_engine(config["engine"], config)
+        segmented_df = engine.segment_customers(sales_df, customers_df, ledger=ledger)
+        push_entries(ledger)
         return segmented_df.to_json(orient="split", date_format="iso")
 
     @task()
-    def anomalies_sales_task(sales: str) -> str:
+    def anomalies_sales_task(sales: str, lineage_config: dict) -> str:
+        import pandas as pd
+        from include.etl.engine import get_engine
+        from include.etl.lineage import LineageLedger, push_entries
+
+        ledger = LineageLedger.from_config(lineage_config)
         sales_df = pd.read_json(sales, orient="split")
-        sales_df = detect_sales_anomalies(sales_df)
+        engine = get_engine(config["engine"], config)
+        sales_df = engine.detect_sales_anomalies(sales_df, ledger=ledger)
+        push_entries(ledger)
         return sales_df.to_json(orient="split", date_format="iso")
 
     @task()
-    def forecasted_sales(sales: str) -> str:
+    def forecasted_sales(sales: str, lineage_config: dict) -> str:
+        import pandas as pd
+        from include.etl.engine import get_engine
+        from include.etl.lineage import LineageLedger, push_entries
+
+        ledger = LineageLedger.from_config(lineage_config)
         sales_df = pd.read_json(sales, orient="split")
-        sales_df = forecast_sales(sales_df)
+        engine = get_engine(config["engine"], config)
+        sales_df = engine.forecast_sales(sales_df, ledger=ledger)
+        push_entries(ledger)
         return sales_df.to_json(orient="split", date_format="iso")
 
     @task()
     def load_to_snowflake_task(final_json: str, database: str, schema_name: str, table_name: str):
+        import pandas as pd
+        from include.etl.load_data import load_data_to_snowflake
+        from include.etl.sizing import chunk_rows_for_frame
+
         final_df = pd.read_json(final_json, orient="split")
-        load_data_to_snowflake(df=final_df, database=database, schema=schema_name, table=table_name)
+        load_data_to_snowflake(df=final_df, database=database, schema=schema_name, table=table_name,
+                               chunksize=chunk_rows_for_frame(final_df, config["sizing"]))
+
+    @task()
+    def load_partitions_to_snowflake_task(final_json: str, database: str, schema_name: str, table_name: str,
+                                          partition_column: str):
+        import pandas as pd
+        from include.etl.load_data import load_partitions_to_snowflake
+        from include.etl.sizing import chunk_rows_for_frame
+
+        final_df = pd.read_json(final_json, orient="split")
+        load_partitions_to_snowflake(df=final_df, database=database, schema=schema_name, table=table_name,
+                                     partition_column=partition_column,
+                                     chunksize=chunk_rows_for_frame(final_df, config["sizing"]))
+
+    @task(trigger_rule="all_done")
+    def load_rejects_task(transform_task_id: str, database: str, schema_name: str, table_name: str):
+        import pandas as pd
+        from airflow.sdk import get_current_context
+        from include.etl.load_data import load_data_to_snowflake
+        from include.etl.quarantine import REJECTS_XCOM_KEY
+
+        # all_done: the rejects matter most when the transform failed on the reject ratio
+        rejects_json = get_current_context()["ti"].xcom_pull(task_ids=transform_task_id, key=REJECTS_XCOM_KEY)
+        if not rejects_json:
+            logging.info(f"No rejected rows for {schema_name}.{table_name}")
+            return
+        rejects_df = pd.read_json(rejects_json, orient="split", dtype=False)
+        load_data_to_snowflake(df=rejects_df, database=database, schema=schema_name, table=table_name,
+                               if_exists="append")
+
+    @task(trigger_rule="all_done")
+    def lineage_report_task(task_ids: list, database: str, schema_name: str | None, table_name: str | None) -> str:
+        from airflow.sdk import get_current_context
+        from include.etl.lineage import LINEAGE_XCOM_KEY, build_report, reconcile
+
+        # all_done: the report is most useful exactly when a stage failed or lost rows
+        context = get_current_context()
+        entries_by_task = {
+            task_id: context["ti"].xcom_pull(task_ids=task_id, key=LINEAGE_XCOM_KEY) for task_id in task_ids
+        }
+        report = build_report(entries_by_task, run_id=context["run_id"])
+        logging.info(f"Lineage report:\n{report.drop(columns=['column_checksums']).to_string(index=False)}")
+
+        unexplained = reconcile(report)
+        if not unexplained.empty:
+            logging.warning(f"Rows lost without a counted reason in: {unexplained['stage'].tolist()}")
+
+        if table_name and not report.empty:
+            from include.etl.load_data import load_data_to_snowflake
+
+            load_data_to_snowflake(df=report, database=database, schema=schema_name, table=table_name,
+                                   if_exists="append")
+        return report.to_json(orient="split")
 
     with TaskGroup("extraction") as extraction:
         files = extract_data(
             bucket=config['s3']['bucket'],
             folder=config['s3']['folder'],
-            aws_conn_id=config['aws_conn_id']
+            aws_conn_id=config['aws_conn_id'],
         )
         
         sales_file = get_sales_file(files=files)
+        deduplicated_sales = deduplicate_sales_task(
+            sales_file=sales_file,
+            key_columns=config["dedup"]["key_columns"],
+            lineage_config=config["lineage"],
+        )
         customers_file = get_customers_file(files=files)
         products_file = get_products_file(files=files)
 
 
     with TaskGroup("transform") as transform:
-        transformed_sales = transform_sales_data(sales_file=sales_file)
-        transformed_customers = transform_customers_file(customers_file=customers_file)
-        transformed_products = transform_product_file(products_file=products_file)
-        merge_output = merged_data_task(transformed_sales, transformed_customers, transformed_products)
+        transformed_sales = transform_sales_data(
+            sales_file=deduplicated_sales["sales"],
+            quarantine_config=config["quarantine"],
+            lineage_config=config["lineage"],
+        )
+        transformed_customers = transform_customers_file(
+            customers_file=customers_file,
+            quarantine_config=config["quarantine"],
+            lineage_config=config["lineage"],
+        )
+        transformed_products = transform_product_file(
+            products_file=products_file,
+            quarantine_config=config["quarantine"],
+            lineage_config=config["lineage"],
+        )
+        merge_output = merged_data_task(
+            transformed_sales, transformed_customers, transformed_products, lineage_config=config["lineage"]
+        )
 
     with TaskGroup("analytics") as analytics:
-        aggregated_output = aggregated_data_task(merge_output)
-        segment_output = segment_customers_task(transformed_sales, transformed_customers)
-        detect_anomalies_output = anomalies_sales_task(transformed_sales)
-        forecast_sales_output = forecasted_sales(transformed_sales)
+        aggregated_output = aggregated_data_task(merge_output, config["lineage"])
+        segment_output = segment_customers_task(transformed_sales, transformed_customers, config["lineage"])
+        detect_anomalies_output = anomalies_sales_task(transformed_sales, config["lineage"])
+        forecast_sales_output = forecasted_sales(transformed_sales, config["lineage"])
 
     with TaskGroup("loading") as loading:
         load_to_snowflake_task.override(task_id="load_cleaned_sales")(transformed_sales, config["snowflake"]["database"],
@@ -142,9 +327,10 @@ def etl_pipeline_dag():
                                config["snowflake"]["targets"]["products"]["tables"],
                                )
         
-        load_to_snowflake_task.override(task_id="load_monthly_sales")(aggregated_output, config["snowflake"]["database"],
+        load_partitions_to_snowflake_task.override(task_id="load_monthly_sales")(aggregated_output, config["snowflake"]["database"],
                                config["snowflake"]["targets"]["monthly_sales"]["schema"],
                                config["snowflake"]["targets"]["monthly_sales"]["tables"],
+                               config["snowflake"]["targets"]["monthly_sales"]["partition_column"],
                                )
 
         load_to_snowflake_task.override(task_id="load_customer_segment")(segment_output, config["snowflake"]["database"],
@@ -152,13 +338,37 @@ def etl_pipeline_dag():
                                config["snowflake"]["targets"]["customer_segment"]["tables"],
                                )
 
-        load_to_snowflake_task.override(task_id="load_forecast_sales")(forecast_sales_output, config["snowflake"]["database"],
+        load_partitions_to_snowflake_task.override(task_id="load_forecast_sales")(forecast_sales_output, config["snowflake"]["database"],
                                config["snowflake"]["targets"]["forecast_sales"]["schema"],
                                config["snowflake"]["targets"]["forecast_sales"]["tables"],
+                               config["snowflake"]["targets"]["forecast_sales"]["partition_column"],
                                )
 
-        load_to_snowflake_task.override(task_id="load_detect_sales_anomalies")(detect_anomalies_output, config["snowflake"]["database"],
+        load_partitions_to_snowflake_task.override(task_id="load_detect_sales_anomalies")(detect_anomalies_output, config["snowflake"]["database"],
                                config["snowflake"]["targets"]["detect_sales_anomalies"]["schema"],
                                config["snowflake"]["targets"]["detect_sales_anomalies"]["tables"],
+                               config["snowflake"]["targets"]["detect_sales_anomalies"]["partition_column"],
                                )
+
+        if config["quarantine"]["enabled"]:
+            for dataset, output in [("sales", transformed_sales), ("customers", transformed_customers),
+                                    ("products", transformed_products)]:
+                output.operator >> load_rejects_task.override(task_id=f"load_{dataset}_rejects")(
+                                       output.operator.task_id,
+                                       config["snowflake"]["database"],
+                                       config["snowflake"]["targets"][dataset]["schema"],
+                                       f'{config["snowflake"]["targets"][dataset]["tables"]}_rejects',
+                                       )
+
+    if config["lineage"]["enabled"]:
+        stage_tasks = [output.operator for output in [
+            deduplicated_sales, transformed_sales, transformed_customers, transformed_products, merge_output,
+            aggregated_output, segment_output, detect_anomalies_output, forecast_sales_output,
+        ]]
+        stage_tasks >> lineage_report_task(
+            task_ids=[stage_task.task_id for stage_task in stage_tasks],
+            database=config["snowflake"]["database"],
+            schema_name=config["lineage"]["audit"]["schema"],
+            table_name=config["lineage"]["audit"]["tables"],
+        )
 etl_pipeline_dag()
\ No newline at end of file
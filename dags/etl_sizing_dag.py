@@ -0,0 +1,46 @@
+from pathlib import Path
+
+from airflow.providers.standard.operators.trigger_dagrun import TriggerDagRunOperator
+from airflow.sdk import dag, task
+from pendulum import datetime
+
+from include.config_loader import load_config
+from include.etl.sizing import RESOURCE_PLAN_CONF_KEY
+
+# Same rule as etl_pipeline_dag: heavy imports stay inside the task bodies.
+CONFIG_PATH = Path(__file__).resolve().parent.parent / "include" / "config.yaml"
+
+config = load_config(str(CONFIG_PATH))
+
+
+@dag(
+    start_date=datetime(2026, 1, 1),
+    schedule='@daily',
+    catchup=False,
+    tags=['exercise'],
+)
+def etl_sizing_dag():
+    """
+    Plan the resources of the daily etl_pipeline_dag run from the S3 object sizes, then trigger it with the plan.
+    Pools and queues are fixed when a run's task instances are created, so the plan has to exist before the run.
+    """
+    @task()
+    def plan_resources_task(bucket: str, folder: str, aws_conn_id: str, sizing_config: dict) -> dict:
+        from include.etl.extract_data_s3 import list_object_sizes
+        from include.etl.sizing import SIZING_HISTORY_VARIABLE, load_variable, plan_resources
+
+        object_sizes = list_object_sizes(bucket=bucket, folder=folder, aws_conn_id=aws_conn_id)
+        return plan_resources(object_sizes, load_variable(SIZING_HISTORY_VARIABLE), sizing_config)
+
+    plan = plan_resources_task(
+        bucket=config['s3']['bucket'],
+        folder=config['s3']['folder'],
+        aws_conn_id=config['aws_conn_id'],
+        sizing_config=config["sizing"],
+    )
+    TriggerDagRunOperator(
+        task_id="trigger_etl_pipeline",
+        trigger_dag_id="etl_pipeline_dag",
+        conf={RESOURCE_PLAN_CONF_KEY: plan},
+    )
+etl_sizing_dag()
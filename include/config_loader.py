@@ -0,0 +1,17 @@
+import os
+from functools import lru_cache
+
+from airflow.utils import yaml
+
+
+def load_config(path: str) -> dict:
+    """
+    Load the pipeline config, parsing the file only once per modification
+    """
+    return _load_config(os.path.abspath(path), os.stat(path).st_mtime_ns)
+
+
+@lru_cache(maxsize=8)
+def _load_config(path: str, mtime_ns: int) -> dict:
+    with open(path, 'r') as file:
+        return yaml.safe_load(file)
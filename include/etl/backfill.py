@@ -0,0 +1,223 @@
+import pandas as pd
+
+from ..logger import setup_logger
+from ..validations.aggregates_schema import validate_post_aggregates_schema
+from ..validations.anomalies_schema import validate_post_anomalies_schema
+from ..validations.forecast_schema import validate_post_sales_forecast_schema
+from ..validations.segment_schema import validate_backfill_segmentation_schema
+from .transform import drop_extra_columns
+
+logging = setup_logger("etl.backfill")
+
+# A backfill run computes, for every logical date in the range, what the daily run of that date computes, without
+# one DAG run per date. A daily run reads every order in the S3 folder, so its results are as of that date:
+# logical date D covers the orders with an order_date on or before D. The sales are read once and every result is
+# built from running totals over the days instead of a copy of the history per date.
+# Every output keeps the logical_date column the results are partitioned by.
+LOGICAL_DATE_COLUMN = "logical_date"
+
+SEGMENT_BINS = [0, 1000, 5000, 10000, float("inf")]
+SEGMENT_LABELS = ["Low", "Medium", "High", "VIP"]
+
+
+def logical_dates(start_date: str, end_date: str) -> pd.DatetimeIndex:
+    dates = pd.date_range(start_date, end_date, freq="D")
+    if dates.empty:
+        raise ValueError(f"Backfill start_date {start_date} is after end_date {end_date}")
+    return dates
+
+
+def order_days(df: pd.DataFrame) -> pd.Series:
+    return pd.to_datetime(df["order_date"], format="mixed", errors="coerce").dt.normalize()
+
+
+def sales_up_to(sales_df: pd.DataFrame, end_date: str) -> pd.DataFrame:
+    """
+    Cleaned sales a backfill up to end_date needs: every order placed on or before end_date
+    """
+    sales_df = sales_df.loc[order_days(sales_df) <= pd.Timestamp(end_date)]
+    logging.info(f"Backfill up to {end_date}: {len(sales_df)} sales rows")
+    return sales_df
+
+
+def as_of(dates: pd.DatetimeIndex, running_df: pd.DataFrame, keys_df: pd.DataFrame, by: str) -> pd.DataFrame:
+    """
+    Every (logical date, `by` key) pair with the last running total recorded on or before the date, NaN before
+    the key's first day. `running_df` has one row per key and day with a `day` column
+    """
+    grid = pd.merge(pd.DataFrame({LOGICAL_DATE_COLUMN: dates}), keys_df, how="cross")
+    return pd.merge_asof(grid.sort_values(LOGICAL_DATE_COLUMN, kind="stable"), running_df.sort_values("day"),
+                         left_on=LOGICAL_DATE_COLUMN, right_on="day", by=by, direction="backward")
+
+
+def backfill_monthly_aggregates(merged_df: pd.DataFrame, start_date: str, end_date: str) -> pd.DataFrame:
+    """
+    Monthly aggregates as of every logical date, from running per-month totals and first-order days
+    """
+    logging.info("Computing backfill monthly aggregates")
+    dates = logical_dates(start_date, end_date)
+    orders_df = merged_df[["order_date", "total_revenue", "customer_id"]].copy()
+    orders_df["day"] = order_days(orders_df)
+    orders_df = orders_df[orders_df["day"] <= dates[-1]]
+    # the daily Grouper labels every month with its last day
+    orders_df["month"] = orders_df["day"].dt.to_period("M").dt.to_timestamp(how="end").dt.normalize()
+
+    daily_df = orders_df.groupby(["month", "day"]).agg(total_sales=("total_revenue", "sum"))
+    # a customer counts towards a month from the first day they ordered in it
+    first_days = orders_df.groupby(["month", "customer_id"])["day"].min()
+    new_customers = first_days.groupby([first_days.index.get_level_values("month"), first_days]).size()
+    daily_df["unique_customers"] = new_customers.reindex(daily_df.index, fill_value=0)
+    running_df = daily_df.groupby(level="month").cumsum().reset_index()
+
+    months = pd.DataFrame({"month": pd.date_range(running_df["month"].min(), running_df["month"].max(), freq="M")})
+    aggregate_df = as_of(dates, running_df, months, by="month")
+
+    # the daily run covers the months from the first order to the last order placed by that date
+    last_days = pd.Series(running_df["day"].sort_values().unique())
+    last_day = last_days.reindex(last_days.searchsorted(aggregate_df[LOGICAL_DATE_COLUMN], side="right") - 1)
+    last_month = last_day.dt.to_period("M").dt.to_timestamp(how="end").dt.normalize().to_numpy()
+    aggregate_df = aggregate_df[aggregate_df["month"].to_numpy() <= last_month]
+
+    aggregate_df = pd.DataFrame({
+        LOGICAL_DATE_COLUMN: aggregate_df[LOGICAL_DATE_COLUMN],
+        "order_date": aggregate_df["month"],
+        "total_sales": aggregate_df["total_sales"].fillna(0.0),
+        "unique_customers": aggregate_df["unique_customers"].fillna(0).astype("int64"),
+    }).sort_values([LOGICAL_DATE_COLUMN, "order_date"]).reset_index(drop=True)
+
+    aggregate_df = validate_post_aggregates_schema(aggregate_df)
+
+    logging.info(f"Computed backfill monthly aggregates: {len(aggregate_df)} rows")
+    return aggregate_df
+
+
+def backfill_segment_customers(sales_df: pd.DataFrame, customer_df: pd.DataFrame, start_date: str,
+                               end_date: str) -> pd.DataFrame:
+    """
+    Customer segments on the total spent up to every logical date, from per-customer running totals of daily sums
+    """
+    logging.info("Segmenting customers for every logical date")
+    dates = logical_dates(start_date, end_date)
+    orders_df = sales_df[["customer_id", "total_revenue"]].assign(day=order_days(sales_df))
+    orders_df = orders_df[orders_df["day"] <= dates[-1]]
+
+    daily_spent = orders_df.groupby(["customer_id", "day"])["total_revenue"].sum()
+    running_df = daily_spent.groupby(level="customer_id").cumsum().rename("total_spent").reset_index()
+
+    # customers keep the row order of customer_df inside a logical date, like the daily left join
+    customers = customer_df[["customer_id", "signup_date"]].assign(customer_position=range(len(customer_df)))
+    segmented_df = as_of(dates, running_df, customers, by="customer_id")
+    # customers without any sale by that date
+    segmented_df = segmented_df.dropna(subset=["total_spent"])
+    segmented_df = segmented_df.sort_values([LOGICAL_DATE_COLUMN, "customer_position"])
+
+    segmented_df["customer_segment"] = pd.cut(
+        segmented_df["total_spent"],
+        bins=SEGMENT_BINS,
+        labels=SEGMENT_LABELS,
+    ).astype(str)
+    segmented_df["segmentation_date"] = pd.to_datetime(segmented_df["signup_date"], format="mixed", errors="coerce")
+
+    allowed_columns = [LOGICAL_DATE_COLUMN, "customer_id", "total_spent", "customer_segment", "segmentation_date"]
+    df_segmented = drop_extra_columns(segmented_df, allowed_columns).reset_index(drop=True)
+
+    df_segmented = validate_backfill_segmentation_schema(df_segmented)
+
+    logging.info(f"Final backfill segmented customers: {len(df_segmented)} rows")
+    return df_segmented
+
+
+def backfill_sales_anomalies(sales_df: pd.DataFrame, start_date: str, end_date: str) -> pd.DataFrame:
+    """
+    Sales anomalies as of every logical date, the mean + 3 std threshold of a date is the expanding mean and std
+    of the sales up to it
+    """
+    logging.info("Detecting sales anomalies for every logical date")
+    dates = logical_dates(start_date, end_date)
+    sales_df = sales_df.assign(day=order_days(sales_df))
+    sales_df = sales_df[sales_df["day"] <= dates[-1]].reset_index(drop=True)
+
+    by_day = sales_df.sort_values("day", kind="stable")
+    revenue = by_day["total_revenue"].expanding()
+    day_thresholds = (revenue.mean() + (3 * revenue.std())).groupby(by_day["day"]).last()
+    thresholds = day_thresholds.reindex(dates, method="ffill")
+
+    # only the sales above the lowest threshold of the range can be an anomaly on any date
+    candidates = sales_df[sales_df["total_revenue"] > thresholds.min()]
+    anomalies_df = pd.merge(
+        pd.DataFrame({LOGICAL_DATE_COLUMN: dates, "threshold": thresholds.to_numpy()}),
+        candidates.reset_index(names="sales_position"),
+        how="cross",
+    )
+    anomalies_df = anomalies_df[(anomalies_df["day"] <= anomalies_df[LOGICAL_DATE_COLUMN])
+                                & (anomalies_df["total_revenue"] > anomalies_df["threshold"])]
+    anomalies_df = anomalies_df.sort_values([LOGICAL_DATE_COLUMN, "sales_position"])
+
+    anomalies_df["order_date"] = pd.to_datetime(anomalies_df["order_date"], format="mixed", errors="coerce")
+    allowed_columns = [LOGICAL_DATE_COLUMN, "order_id", "customer_id", "product_id", "order_date", "total_revenue"]
+    df_anomalies = drop_extra_columns(anomalies_df, allowed_columns).reset_index(drop=True)
+
+    df_anomalies = validate_post_anomalies_schema(df_anomalies)
+
+    logging.info(f"Final backfill anomalies: {len(df_anomalies)} rows")
+    return df_anomalies
+
+
+def backfill_forecast_sales(sales_df: pd.DataFrame, end_date: str) -> pd.DataFrame:
+    """
+    7 rows rolling mean forecast over the sales sorted by order_date, so the forecast of an order never changes
+    with later dates. Every order is written once under its own order day: the forecast as of a logical date is
+    every partition up to it
+    """
+    logging.info("Forecasting sales up to the end of the backfill")
+    forecast_df = sales_df.assign(**{LOGICAL_DATE_COLUMN: order_days(sales_df)})
+    forecast_df = forecast_df[forecast_df[LOGICAL_DATE_COLUMN] <= pd.Timestamp(end_date)]
+    forecast_df["order_date"] = pd.to_datetime(forecast_df["order_date"], format="mixed", errors="coerce")
+    forecast_df = forecast_df.sort_values("order_date", kind="stable").reset_index(drop=True)
+
+    forecast_df["sales_forecast"] = forecast_df["total_revenue"].rolling(window=7, min_periods=1).mean()
+
+    allowed_columns = [LOGICAL_DATE_COLUMN, "order_date", "total_revenue", "sales_forecast"]
+    forecast_df = drop_extra_columns(forecast_df, allowed_columns)
+
+    forecast_df = validate_post_sales_forecast_schema(forecast_df)
+
+    logging.info(f"Backfill forecast sales: {len(forecast_df)} rows")
+    return forecast_df
+
+
+def write_partitioned(df: pd.DataFrame, path: str, storage_options: dict | None = None):
+    """
+    Write Parquet partitioned by logical_date=YYYY-MM-DD, only the partitions being written are replaced
+    """
+    df = df.copy()
+    df[LOGICAL_DATE_COLUMN] = pd.to_datetime(df[LOGICAL_DATE_COLUMN]).dt.strftime("%Y-%m-%d")
+
+    df.to_parquet(
+        path,
+        index=False,
+        partition_cols=[LOGICAL_DATE_COLUMN],
+        storage_options=storage_options,
+        existing_data_behavior="delete_matching",
+    )
+    logging.info(f"Wrote {len(df)} rows over {df[LOGICAL_DATE_COLUMN].nunique()} partitions to {path}")
+
+
+def write_rejects(rejects_df: pd.DataFrame, path: str, storage_options: dict | None = None):
+    """
+    Write the quarantined rows of a backfill as one Parquet file, the next backfill of the folder replaces it
+    """
+    rejects_df.to_parquet(path, index=False, storage_options=storage_options)
+    logging.info(f"Wrote {len(rejects_df)} rejected rows to {path}")
+
+
+def output_storage_options(output_path: str, aws_conn_id: str) -> dict | None:
+    """
+    S3 credentials when the backfill writes to S3, None for a local path
+    """
+    if not output_path.startswith("s3://"):
+        return None
+    from .extract_data_s3 import get_storage_options
+
+    _, storage_options = get_storage_options(aws_conn_id)
+    return storage_options
@@ -0,0 +1,22 @@
+import importlib
+
+# Transform modules exposing the same clean_*_data / merge_data / analytics functions on pandas frames
+ENGINES = {
+    "pandas": "transform",
+    "polars": "transform_polars",
+    "duckdb": "transform_duckdb",
+}
+
+
+def get_engine(name: str | None = None, options: dict | None = None):
+    """
+    Transform module of the `engine` set in config.yaml, pandas when it is not set.
+    `options` is the loaded config, the engine's own section (e.g. `duckdb`) goes to its configure() if it has one
+    """
+    name = name or "pandas"
+    if name not in ENGINES:
+        raise ValueError(f"Unknown engine {name}, expected one of {sorted(ENGINES)}")
+    module = importlib.import_module(f".{ENGINES[name]}", __package__)
+    if hasattr(module, "configure"):
+        module.configure((options or {}).get(name))
+    return module
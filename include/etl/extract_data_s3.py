@@ -23,6 +23,15 @@ def get_storage_options(aws_conn_id: str):
 
     return s3_hook, storage_options
 
+def list_object_sizes(bucket: str, folder: str, aws_conn_id: str) -> dict:
+    """
+    Return the size in bytes of every object under the folder, without downloading them
+    """
+    s3_hook = S3Hook(aws_conn_id=aws_conn_id)
+    keys = s3_hook.list_keys(bucket_name=bucket, prefix=folder) or []
+
+    return {key: s3_hook.head_object(key=key, bucket_name=bucket)["ContentLength"] for key in keys}
+
 def extract_data_from_s3(bucket: str, folder: str, aws_conn_id: str) -> dict:
     """
     Extract data from an S3 bucket
@@ -0,0 +1,106 @@
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from ..logger import setup_logger
+
+logging = setup_logger("etl.lineage")
+
+# XCom key the tasks push their ledger entries under, the report task pulls it from every stage task
+LINEAGE_XCOM_KEY = "lineage"
+
+REPORT_COLUMNS = ["run_id", "task_id", "stage", "input_rows", "output_rows", "null_dropped", "join_dropped",
+                  "rejected", "filtered", "aggregated", "duration_seconds", "column_checksums"]
+
+
+class LineageLedger:
+    """
+    Row counts, drops, column checksums and timing of every transform stage of one task
+    """
+
+    def __init__(self, checksums: bool = True):
+        self.checksums = checksums
+        self.entries = []
+
+    @classmethod
+    def from_config(cls, config: dict) -> "LineageLedger | None":
+        """
+        Build a ledger from the `lineage` section of config.yaml, None when it is disabled
+        """
+        if not config or not config.get("enabled"):
+            return None
+        return cls(checksums=config.get("checksums", True))
+
+    def record(self, stage: str, input_rows: int, output_df: pd.DataFrame, started: float, null_dropped: int = 0,
+               join_dropped: int = 0, rejected: int = 0, filtered: int = 0, aggregated: bool = False):
+        """
+        Add one stage, `started` is the time.perf_counter() taken when the stage began.
+        `filtered` counts rows removed on purpose (duplicates, below the anomaly threshold),
+        `aggregated` marks a groupby stage whose output rows are not input rows
+        """
+        entry = {
+            "stage": stage,
+            "input_rows": int(input_rows),
+            "output_rows": len(output_df),
+            "null_dropped": int(null_dropped),
+            "join_dropped": int(join_dropped),
+            "rejected": int(rejected),
+            "filtered": int(filtered),
+            "aggregated": aggregated,
+            "duration_seconds": round(time.perf_counter() - started, 4),
+        }
+        if self.checksums:
+            entry["column_checksums"] = column_checksums(output_df)
+        self.entries.append(entry)
+        logging.info(
+            f"{stage}: {entry['input_rows']} -> {entry['output_rows']} rows (null dropped {entry['null_dropped']}, "
+            f"join dropped {entry['join_dropped']}, rejected {entry['rejected']}, filtered {entry['filtered']}) "
+            f"in {entry['duration_seconds']}s"
+        )
+
+
+def push_entries(ledger: LineageLedger | None):
+    """
+    Push the ledger entries of the running task to XCom for the report task
+    """
+    if ledger is None:
+        return
+    from airflow.sdk import get_current_context
+
+    get_current_context()["ti"].xcom_push(key=LINEAGE_XCOM_KEY, value=ledger.entries)
+
+
+def column_checksums(df: pd.DataFrame) -> dict:
+    """
+    Order independent checksum of every column: the wrapping uint64 sum of its vectorized value hashes
+    """
+    return {
+        str(column): format(int(pd.util.hash_pandas_object(df[column], index=False).to_numpy().sum(dtype=np.uint64)),
+                            "016x")
+        for column in df.columns
+    }
+
+
+def build_report(entries_by_task: dict, run_id: str) -> pd.DataFrame:
+    """
+    One compact row per stage of the run, checksums kept as a JSON string column
+    """
+    rows = []
+    for task_id, entries in entries_by_task.items():
+        for entry in entries or []:
+            row = dict(entry, run_id=run_id, task_id=task_id)
+            row["column_checksums"] = json.dumps(entry.get("column_checksums", {}), sort_keys=True)
+            rows.append(row)
+    return pd.DataFrame(rows, columns=REPORT_COLUMNS)
+
+
+def reconcile(report: pd.DataFrame) -> pd.DataFrame:
+    """
+    Row-level stages whose output is not their input minus the counted drops, i.e. rows lost (or fanned out)
+    without a reason
+    """
+    accounted = report["output_rows"] + report["null_dropped"] + report["join_dropped"] + report["rejected"] + \
+        report["filtered"]
+    return report[~report["aggregated"].astype(bool) & (accounted != report["input_rows"])]
@@ -2,9 +2,11 @@ import pandas as pd
 
 from airflow.providers.snowflake.hooks.snowflake import SnowflakeHook
 from ..logger import setup_logger
+from .partition_writer import write_changed_partitions
 logging = setup_logger("etl.load_data")
 
-def load_data_to_snowflake(df: pd.DataFrame, database: str, schema: str, table: str):
+def load_data_to_snowflake(df: pd.DataFrame, database: str, schema: str, table: str, if_exists: str = "replace",
+                           chunksize: int | None = None):
     """
     Loads data to Snowflake
     """
@@ -20,10 +22,29 @@ def load_data_to_snowflake(df: pd.DataFrame, database: str, schema: str, table:
             con=engine,
             schema=schema,
             index=False,
-            if_exists="replace",
+            if_exists=if_exists,
             method="multi",
-            #chinksize=10000,
+            # without chunksize "multi" sends the whole frame as one INSERT
+            chunksize=chunksize,
         )
     except Exception as e:
         logging.error(f"Failed loading into {database}.{schema}.{table}\nError: {e}")
-        raise
\ No newline at end of file
+        raise
+
+def load_partitions_to_snowflake(df: pd.DataFrame, database: str, schema: str, table: str, partition_column: str,
+                                 chunksize: int | None = None):
+    """
+    Loads data to Snowflake rewriting only the partition_column months that changed
+    """
+    if df.empty:
+        raise ValueError("Empty dataframe")
+
+    try:
+        snowflake_hook = SnowflakeHook(snowflake_conn_id="my_snowflake_conn")
+        engine = snowflake_hook.get_sqlalchemy_engine()
+
+        write_changed_partitions(df, engine=engine, table=table, partition_column=partition_column, schema=schema,
+                                 chunksize=chunksize)
+    except Exception as e:
+        logging.error(f"Failed loading partitions into {database}.{schema}.{table}\nError: {e}")
+        raise
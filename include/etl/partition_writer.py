@@ -0,0 +1,140 @@
+import numpy as np
+import pandas as pd
+import sqlalchemy as sa
+
+from ..logger import setup_logger
+
+logging = setup_logger("etl.partition_writer")
+
+# Per-month row counts and checksums of what was last written live in <table>_partitions next to the target,
+# the counts are checked against the target itself before the manifest is trusted
+PARTITIONS_TABLE_SUFFIX = "_partitions"
+
+
+def month_keys(df: pd.DataFrame, partition_column: str) -> pd.Series:
+    """
+    YYYY-MM partition of every row
+    """
+    dates = pd.to_datetime(df[partition_column], format="mixed", errors="coerce")
+    if dates.isna().any():
+        raise ValueError(f"{dates.isna().sum()} rows have no {partition_column}, they can not be partitioned")
+    return dates.dt.strftime("%Y-%m")
+
+
+def month_fingerprints(df: pd.DataFrame, partition_column: str) -> pd.DataFrame:
+    """
+    Row count and order independent checksum (sum of 32-bit row hashes) of every month, in one vectorized pass
+    """
+    row_hashes = (pd.util.hash_pandas_object(df, index=False).to_numpy() >> np.uint64(32)).astype(np.int64)
+    fingerprints = pd.DataFrame({"month": month_keys(df, partition_column).to_numpy(), "row_hash": row_hashes})
+    return fingerprints.groupby("month").agg(
+        row_count=("row_hash", "size"),
+        checksum=("row_hash", "sum"),
+    )
+
+
+def changed_months(incoming: pd.DataFrame, stored: pd.DataFrame) -> list:
+    """
+    Months whose count or checksum differ, new months, and stored months that are no longer in the data
+    """
+    joined = incoming.join(stored, how="outer", lsuffix="_new", rsuffix="_old")
+    differs = (joined["row_count_new"] != joined["row_count_old"]) | (joined["checksum_new"] != joined["checksum_old"])
+    return sorted(joined.index[differs])
+
+
+def read_stored_fingerprints(conn, table: str, schema: str | None) -> pd.DataFrame | None:
+    inspector = sa.inspect(conn)
+    manifest = f"{table}{PARTITIONS_TABLE_SUFFIX}"
+    if not inspector.has_table(table, schema=schema) or not inspector.has_table(manifest, schema=schema):
+        return None
+    manifest_table = sa.Table(manifest, sa.MetaData(), schema=schema, autoload_with=conn)
+    stored = pd.read_sql(sa.select(manifest_table), conn)
+    return stored.set_index("month")
+
+
+def month_bounds(month: str) -> tuple:
+    start = pd.Period(month, freq="M").start_time
+    return start.to_pydatetime(), (start + pd.DateOffset(months=1)).to_pydatetime()
+
+
+def target_month_counts(conn, target: sa.Table, partition_column: str, months: list) -> pd.Series:
+    """
+    COUNT(*) of the target table per month of `months` in one query, rows in any other month count under None
+    """
+    column = target.c[partition_column]
+    whens = []
+    for label in months:
+        start, end = month_bounds(label)
+        whens.append((sa.and_(column >= start, column < end), label))
+    month = (sa.case(*whens, else_=None) if whens else sa.null()).label("month")
+    rows = conn.execute(sa.select(month, sa.func.count().label("row_count")).group_by(month)).all()
+    return pd.Series({row.month: row.row_count for row in rows}, dtype="int64")
+
+
+def manifest_matches_target(stored: pd.DataFrame, counts: pd.Series) -> bool:
+    """
+    The manifest is only trusted when its row counts are what the target table actually holds per month
+    """
+    unknown_rows = counts[[month not in stored.index for month in counts.index]].sum()
+    return unknown_rows == 0 and (counts.reindex(stored.index, fill_value=0) == stored["row_count"]).all()
+
+
+def qualified_name(table: str, schema: str | None) -> str:
+    return f"{schema}.{table}" if schema else table
+
+
+def write_changed_partitions(df: pd.DataFrame, engine, table: str, partition_column: str,
+                             schema: str | None = None, chunksize: int | None = None) -> list:
+    """
+    Delete and insert only the months of `table` whose content changed, in one transaction.
+    Without a partitions manifest yet (first run), or when its row counts no longer match a COUNT(*) of the
+    table (written outside this writer), the table is rewritten once and the manifest recreated
+    """
+    df = df.copy()
+    df[partition_column] = pd.to_datetime(df[partition_column], format="mixed", errors="coerce")
+    months = month_keys(df, partition_column)
+    incoming = month_fingerprints(df, partition_column)
+    manifest = f"{table}{PARTITIONS_TABLE_SUFFIX}"
+
+    with engine.begin() as conn:
+        stored = read_stored_fingerprints(conn, table, schema)
+        if stored is None:
+            logging.info(f"No partitions manifest for {qualified_name(table, schema)}, rewriting all {len(incoming)} months")
+        else:
+            target = sa.Table(table, sa.MetaData(), schema=schema, autoload_with=conn)
+            counts = target_month_counts(conn, target, partition_column, sorted(stored.index))
+            if not manifest_matches_target(stored, counts):
+                logging.warning(f"Partitions manifest of {qualified_name(table, schema)} does not match the "
+                                f"table row counts, rewriting all {len(incoming)} months")
+                stored = None
+
+        if stored is None:
+            df.to_sql(name=table, con=conn, schema=schema, index=False, if_exists="replace", method="multi",
+                      chunksize=chunksize)
+            incoming.reset_index().to_sql(name=manifest, con=conn, schema=schema, index=False, if_exists="replace")
+            return sorted(incoming.index)
+
+        changed = changed_months(incoming, stored)
+        if not changed:
+            logging.info(f"No changed months for {qualified_name(table, schema)}")
+            return []
+
+        manifest_table = sa.Table(manifest, sa.MetaData(), schema=schema, autoload_with=conn)
+        for month in changed:
+            start, end = month_bounds(month)
+            conn.execute(target.delete().where(
+                target.c[partition_column] >= start,
+                target.c[partition_column] < end,
+            ))
+        conn.execute(manifest_table.delete().where(manifest_table.c["month"].in_(changed)))
+
+        changed_rows = df[months.isin(changed).to_numpy()]
+        if not changed_rows.empty:
+            changed_rows.to_sql(name=table, con=conn, schema=schema, index=False, if_exists="append",
+                                method="multi", chunksize=chunksize)
+        changed_fingerprints = incoming[incoming.index.isin(changed)].reset_index()
+        if not changed_fingerprints.empty:
+            changed_fingerprints.to_sql(name=manifest, con=conn, schema=schema, index=False, if_exists="append")
+
+    logging.info(f"Rewrote {len(changed)} of {len(incoming)} months in {qualified_name(table, schema)}: {changed}")
+    return changed
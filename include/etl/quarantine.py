@@ -0,0 +1,156 @@
+import copy
+
+import pandas as pd
+import pandera.pandas as pa
+
+from pandera.errors import SchemaErrors
+
+from ..logger import setup_logger
+
+logging = setup_logger("etl.quarantine")
+
+# XCom key the transform tasks push their rejects under, pushed even when the task fails on the reject ratio
+REJECTS_XCOM_KEY = "rejects"
+
+
+class Quarantine:
+    """
+    Collects the bad rows of one dataset with a reason code instead of dropping them or failing the whole run
+    """
+
+    def __init__(self, name: str, max_reject_ratio: float = 0.0):
+        self.name = name
+        self.max_reject_ratio = max_reject_ratio
+        self._rejects = []
+
+    @classmethod
+    def from_config(cls, name: str, config: dict) -> "Quarantine | None":
+        """
+        Build a quarantine from the `quarantine` section of config.yaml, None when it is disabled
+        """
+        if not config or not config.get("enabled"):
+            return None
+        return cls(name, max_reject_ratio=config.get("max_reject_ratio", 0.0))
+
+    @property
+    def rejected_rows(self) -> int:
+        return sum(len(rejects) for rejects in self._rejects)
+
+    def split_nulls(self, df: pd.DataFrame, reason: str = "null", columns: list | None = None) -> pd.DataFrame:
+        """
+        Move rows with a null in `columns` (all columns by default) to the quarantine, reason is `<reason>:<first null column>`
+        """
+        nulls = df[columns].isna() if columns else df.isna()
+        bad = nulls.any(axis=1)
+        if bad.any():
+            self._reject(df[bad], reason + ":" + nulls[bad].idxmax(axis=1))
+        return df[~bad].copy()
+
+    def split_rows(self, df: pd.DataFrame, bad: pd.Series, reason: str) -> pd.DataFrame:
+        """
+        Move the rows flagged in `bad` to the quarantine as they are, with the same `reason` for all of them
+        """
+        if bad.any():
+            self._reject(df[bad], pd.Series(reason, index=df.index[bad]))
+        return df[~bad].copy()
+
+    def validate(self, df: pd.DataFrame, schema: pa.DataFrameSchema) -> pd.DataFrame:
+        """
+        Validate lazily and move the failing rows to the quarantine, reason is `schema:<column>:<check>`.
+        The rows are cast to the schema dtypes first: once the nulls are quarantined an int column that held one
+        is still float64, and a failed cast is a row-level failure too. A fractional value in an int column is
+        rejected as `schema:<column>:integral` before the cast, which would otherwise truncate it
+        """
+        df = self.split_fractional(df, schema)
+        schema = coercing(schema)
+        try:
+            return schema.validate(df, lazy=True)
+        except SchemaErrors as e:
+            failure_cases = e.failure_cases
+            row_failures = failure_cases[failure_cases["index"].notna()]
+            if len(row_failures) < len(failure_cases):
+                # column level failures (missing column, wrong dtype) can not be split by row
+                raise
+
+            first_failures = row_failures.drop_duplicates(subset="index")
+            reasons = pd.Series(
+                ("schema:" + first_failures["column"].astype(str) + ":" + first_failures["check"].astype(str)).to_numpy(),
+                index=first_failures["index"].to_numpy(),
+            )
+            bad = df.index.isin(reasons.index)
+            self._reject(df[bad], reasons.reindex(df.index[bad]))
+            return schema.validate(df[~bad])
+
+    def split_fractional(self, df: pd.DataFrame, schema: pa.DataFrameSchema) -> pd.DataFrame:
+        """
+        Move rows with a non whole number in a float column that `schema` types as int to the quarantine
+        """
+        fractional = pd.DataFrame(False, index=df.index, columns=[])
+        for name, column in schema.columns.items():
+            if name in df.columns and pd.api.types.is_integer_dtype(str(column.dtype)) \
+                    and pd.api.types.is_float_dtype(df[name]):
+                fractional[name] = df[name].notna() & (df[name] % 1 != 0)
+        bad = fractional.any(axis=1)
+        if bad.any():
+            self._reject(df[bad], "schema:" + fractional[bad].idxmax(axis=1) + ":integral")
+        return df[~bad]
+
+    def check_ratio(self, total_rows: int):
+        """
+        Fail the run when more than max_reject_ratio of the input rows were quarantined
+        """
+        rejected = self.rejected_rows
+        ratio = rejected / total_rows if total_rows else 0.0
+        logging.info(f"Quarantined {rejected} of {total_rows} {self.name} rows ({ratio:.2%})")
+        if ratio > self.max_reject_ratio:
+            raise ValueError(
+                f"Rejected {rejected} of {total_rows} {self.name} rows ({ratio:.2%}), "
+                f"above the {self.max_reject_ratio:.2%} threshold"
+            )
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Rejected rows as strings (so the rejects table keeps one schema across runs) with dataset and reason columns
+        """
+        if not self._rejects:
+            return pd.DataFrame(columns=["dataset", "reject_reason", "rejected_at"])
+
+        rejects = pd.concat(self._rejects, ignore_index=True)
+        reasons = rejects.pop("reject_reason")
+        rejects = rejects.astype(str)
+        rejects.insert(0, "dataset", self.name)
+        rejects.insert(1, "reject_reason", reasons)
+        rejects.insert(2, "rejected_at", pd.Timestamp.now(tz="UTC").isoformat())
+        return rejects
+
+    def to_json(self) -> str | None:
+        if not self._rejects:
+            return None
+        return self.to_frame().to_json(orient="split")
+
+    def _reject(self, rows: pd.DataFrame, reasons: pd.Series):
+        rejects = rows.copy()
+        rejects["reject_reason"] = reasons.to_numpy()
+        self._rejects.append(rejects)
+
+
+def push_rejects(quarantine: Quarantine | None):
+    """
+    Push the rejects of the running task to XCom for its load_*_rejects task
+    """
+    if quarantine is None:
+        return
+    from airflow.sdk import get_current_context
+
+    get_current_context()["ti"].xcom_push(key=REJECTS_XCOM_KEY, value=quarantine.to_json())
+
+
+def coercing(schema: pa.DataFrameSchema) -> pa.DataFrameSchema:
+    """
+    Copy of `schema` that casts every column to its dtype, the cached schema itself is left as is
+    """
+    if schema.coerce:
+        return schema
+    schema = copy.deepcopy(schema)
+    schema.coerce = True
+    return schema
@@ -0,0 +1,182 @@
+import json
+
+from airflow.sdk import Variable
+
+from ..logger import setup_logger
+
+logging = setup_logger("etl.sizing")
+
+SIZING_HISTORY_VARIABLE = "etl_pipeline_sizing_history"
+
+# dag_run.conf key the plan is passed to etl_pipeline_dag under, read by the task_instance_mutation_hook in
+# config/airflow_local_settings.py when the run's task instances are created
+RESOURCE_PLAN_CONF_KEY = "resource_plan"
+
+DATASET_PATTERNS = {"sales": "sales", "customers": "customer", "products": "product"}
+
+# Datasets a task holds in memory and its peak as a multiple of them (JSON copies, merges, validation copies).
+# The loads share two task functions, so they are profiled by task_id with the dataset each one writes.
+TASK_PROFILES = {
+    "extract_data": (["sales", "customers", "products"], 2.0),
+    # the get_*_file tasks deserialize every frame extract_data returned before picking theirs
+    "get_sales_file": (["sales", "customers", "products"], 2.0),
+    "get_customers_file": (["sales", "customers", "products"], 1.5),
+    "get_products_file": (["sales", "customers", "products"], 1.5),
+    "deduplicate_sales_task": (["sales"], 3.0),
+    "transform_sales_data": (["sales"], 4.0),
+    "transform_customers_file": (["customers"], 4.0),
+    "transform_product_file": (["products"], 4.0),
+    "merged_data_task": (["sales", "customers", "products"], 5.0),
+    "aggregated_data_task": (["sales", "customers", "products"], 3.0),
+    "segment_customers_task": (["sales", "customers"], 3.0),
+    "anomalies_sales_task": (["sales"], 3.0),
+    "forecasted_sales": (["sales"], 3.0),
+    "load_cleaned_sales": (["sales"], 3.0),
+    "load_cleaned_customers": (["customers"], 3.0),
+    "load_cleaned_products": (["products"], 3.0),
+    "load_customer_segment": (["customers"], 3.0),
+    "load_forecast_sales": (["sales"], 2.0),
+    "load_detect_sales_anomalies": (["sales"], 1.0),
+    # one row per month
+    "load_monthly_sales": ([], 2.0),
+    # at most max_reject_ratio of the dataset, as strings
+    "load_sales_rejects": (["sales"], 1.0),
+    "load_customers_rejects": (["customers"], 1.0),
+    "load_products_rejects": (["products"], 1.0),
+    # a few rows per stage
+    "lineage_report_task": ([], 1.0),
+}
+
+# History smoothing, the newest run weighs this much in the recorded bytes-per-row
+HISTORY_WEIGHT = 0.5
+
+
+def dataset_of(key: str) -> str | None:
+    for dataset, pattern in DATASET_PATTERNS.items():
+        if pattern in key:
+            return dataset
+    return None
+
+
+def dataset_input_bytes(object_sizes: dict) -> dict:
+    """
+    Total S3 object bytes of every dataset
+    """
+    input_bytes = {dataset: 0 for dataset in DATASET_PATTERNS}
+    for key, size in object_sizes.items():
+        dataset = dataset_of(key)
+        if dataset and key.lower().endswith(".csv"):
+            input_bytes[dataset] += size
+    return input_bytes
+
+
+def estimate_memory(input_bytes: int, stats: dict | None, default_memory_per_file_byte: float) -> int:
+    """
+    Bytes of a dataset in memory: rows from the recorded file bytes-per-row times the recorded memory bytes-per-row,
+    or a flat multiple of the file size before the first run was recorded
+    """
+    if stats and stats.get("file_bytes_per_row") and stats.get("memory_bytes_per_row"):
+        rows = input_bytes / stats["file_bytes_per_row"]
+        return int(rows * stats["memory_bytes_per_row"])
+    return int(input_bytes * default_memory_per_file_byte)
+
+
+def pick_tier(memory_bytes: int, tiers: list) -> dict:
+    """
+    First tier whose max_bytes fits the estimate, the last tier takes everything above
+    """
+    for tier in tiers:
+        if tier.get("max_bytes") is None or memory_bytes <= tier["max_bytes"]:
+            return tier
+    return tiers[-1]
+
+
+def plan_resources(object_sizes: dict, history: dict, sizing_config: dict) -> dict:
+    """
+    Estimate the peak memory of every task and pick its tier
+    """
+    input_bytes = dataset_input_bytes(object_sizes)
+    dataset_memory = {
+        dataset: estimate_memory(size, history.get(dataset), sizing_config["default_memory_per_file_byte"])
+        for dataset, size in input_bytes.items()
+    }
+
+    tasks = {}
+    for task_name, (datasets, multiplier) in TASK_PROFILES.items():
+        peak = int(sum(dataset_memory[dataset] for dataset in datasets) * multiplier)
+        tier = pick_tier(peak, sizing_config["tiers"])
+        tasks[task_name] = {"peak_memory_bytes": peak, "tier": tier["name"]}
+
+    plan = {"input_bytes": input_bytes, "dataset_memory_bytes": dataset_memory, "tasks": tasks}
+    # resolved here so the mutation hook needs neither the config file nor this module
+    resources = {task_name: task_resources(plan, task_name, sizing_config) for task_name in tasks}
+    plan["resources"] = {task_name: values for task_name, values in resources.items() if values}
+    logging.info(f"Resource plan: {json.dumps(tasks)}")
+    return plan
+
+
+def task_resources(plan: dict, task_name: str, sizing_config: dict) -> dict:
+    """
+    pool / pool_slots / queue overrides for a task, empty when there is no plan yet
+    """
+    task_plan = (plan or {}).get("tasks", {}).get(task_name)
+    if not task_plan:
+        return {}
+
+    tiers = {tier["name"]: tier for tier in sizing_config["tiers"]}
+    tier = tiers.get(task_plan["tier"])
+    if not tier:
+        return {}
+
+    return {key: tier[key] for key in ("pool", "pool_slots", "queue") if tier.get(key) is not None}
+
+
+def chunk_rows_for_frame(df, sizing_config: dict) -> int | None:
+    """
+    Rows per INSERT batch for a load, set when the frame in memory is above chunked_above_bytes.
+    Only the INSERT statements are batched, the frame is already loaded whole
+    """
+    memory_bytes = int(df.memory_usage(deep=True).sum())
+    return sizing_config["chunk_rows"] if memory_bytes > sizing_config["chunked_above_bytes"] else None
+
+
+def record_dataset_stats(history: dict, files: dict, input_bytes: dict) -> dict:
+    """
+    Update the bytes-per-row history of every dataset with the frames this run actually read
+    """
+    history = dict(history)
+    for dataset, file_bytes in input_bytes.items():
+        dfs = [df for key, df in files.items() if dataset_of(key) == dataset]
+        rows = sum(len(df) for df in dfs)
+        if rows and file_bytes:
+            memory_bytes = sum(int(df.memory_usage(deep=True).sum()) for df in dfs)
+            history[dataset] = smooth_stats(history.get(dataset), {
+                "file_bytes_per_row": file_bytes / rows,
+                "memory_bytes_per_row": memory_bytes / rows,
+            })
+            logging.info(f"Recorded {dataset} sizing stats: {history[dataset]}")
+    return history
+
+
+def smooth_stats(previous: dict | None, observed: dict) -> dict:
+    if not previous:
+        return observed
+    return {
+        key: HISTORY_WEIGHT * value + (1 - HISTORY_WEIGHT) * previous.get(key, value)
+        for key, value in observed.items()
+    }
+
+
+def load_variable(key: str) -> dict:
+    """
+    JSON Airflow Variable, empty when it is missing or can not be read
+    """
+    try:
+        return json.loads(Variable.get(key, default="{}"))
+    except Exception as e:
+        logging.warning(f"Could not read Variable {key}: {e}")
+        return {}
+
+
+def save_variable(key: str, value: dict):
+    Variable.set(key, json.dumps(value))
@@ -1,19 +1,28 @@
+import time
+
 import pandas as pd
 from ..logger import setup_logger
+from .lineage import LineageLedger
+from .quarantine import Quarantine
 from ..validations.aggregates_schema import validate_pre_aggregates_schema, validate_post_aggregates_schema
 from ..validations.anomalies_schema import validate_post_anomalies_schema
-from ..validations.customers_schema import validate_pre_customers_schema, validate_post_customer_schema
+from ..validations.customers_schema import validate_pre_customers_schema, validate_post_customer_schema, \
+    get_post_customer_schema
 from ..validations.forecast_schema import validate_post_sales_forecast_schema
-from ..validations.products_schema import validate_pre_products_schema, validate_post_products_schema
-from ..validations.sales_schema import validate_pre_sales_schema, validate_post_sales_schema
+from ..validations.products_schema import validate_pre_products_schema, validate_post_products_schema, \
+    get_post_products_schema
+from ..validations.sales_schema import validate_pre_sales_schema, validate_post_sales_schema, get_post_sales_schema
 from ..validations.segment_schema import validate_post_segmentation_schema
 
 logging = setup_logger("etl.transform")
 
 
-def cleaning_fun(my_df: pd.DataFrame) -> pd.DataFrame:
+def cleaning_fun(my_df: pd.DataFrame, quarantine: Quarantine | None = None) -> pd.DataFrame:
     my_df = my_df.copy()  # avoid modifying original DataFrame outside the function
     my_df.columns = my_df.columns.str.lower().str.replace(' ', '_')
+    if quarantine is not None:
+        # rows with missing values go to the rejects dataset instead of disappearing
+        return quarantine.split_nulls(my_df)
     """
     inplace=True is the same as sales_df = sales_df.dropna()
     """
@@ -21,72 +30,120 @@ def cleaning_fun(my_df: pd.DataFrame) -> pd.DataFrame:
 
     return my_df
 
-def clean_sales_data(sales_df: pd.DataFrame) -> pd.DataFrame:
+def clean_sales_data(sales_df: pd.DataFrame, quarantine: Quarantine | None = None,
+                     ledger: LineageLedger | None = None) -> pd.DataFrame:
     """
-    Remove missing values and standartisation columns
+    Remove missing values and standartisation columns, with a quarantine bad rows are rejected instead
     """
     logging.info(f"Cleaning sales data from {len(sales_df)} rows")
+    started = time.perf_counter()
+    total_rows = len(sales_df)
 
     sales_df = validate_pre_sales_schema(sales_df)
 
-    sales_df = cleaning_fun(sales_df)
+    sales_df = cleaning_fun(sales_df, quarantine)
+    null_dropped = total_rows - len(sales_df) if quarantine is None else 0
     # mixed - all date formats,
     # coerce - returns not a date (not) if value is not convertable
-    sales_df["order_date"] = pd.to_datetime(sales_df["order_date"], format="mixed", errors="coerce")
+    order_date = pd.to_datetime(sales_df["order_date"], format="mixed", errors="coerce")
+    if quarantine is not None:
+        # the raw value is rejected, not the NaT it was parsed to
+        sales_df = quarantine.split_rows(sales_df, order_date.isna(), reason="coerce:order_date")
+    sales_df["order_date"] = order_date
     sales_df["total_revenue"] = sales_df["amount"] * sales_df["quantity"]
 
-    sales_df = validate_post_sales_schema(sales_df)
+    if quarantine is None:
+        sales_df = validate_post_sales_schema(sales_df)
+    else:
+        sales_df = quarantine.validate(sales_df, get_post_sales_schema())
+        quarantine.check_ratio(total_rows)
 
     logging.info(f"Cleaned sales data {len(sales_df)} rows")
+    if ledger is not None:
+        ledger.record("clean_sales_data", total_rows, sales_df, started, null_dropped=null_dropped,
+                      rejected=quarantine.rejected_rows if quarantine else 0)
     return sales_df
 
-def clean_customers_data(customers_df: pd.DataFrame) -> pd.DataFrame:
+def clean_customers_data(customers_df: pd.DataFrame, quarantine: Quarantine | None = None,
+                         ledger: LineageLedger | None = None) -> pd.DataFrame:
     """
-    Remove missing values and standardization columns
+    Remove missing values and standardization columns, with a quarantine bad rows are rejected instead
     """
     logging.info(f"Cleaning customer data from {len(customers_df)} rows")
+    started = time.perf_counter()
+    total_rows = len(customers_df)
 
     customers_df = validate_pre_customers_schema(customers_df)
 
-    customers_df = cleaning_fun(customers_df)
-    customers_df["signup_date"] = pd.to_datetime(customers_df["signup_date"], format="mixed", errors="coerce")
+    customers_df = cleaning_fun(customers_df, quarantine)
+    null_dropped = total_rows - len(customers_df) if quarantine is None else 0
+    signup_date = pd.to_datetime(customers_df["signup_date"], format="mixed", errors="coerce")
+    if quarantine is not None:
+        customers_df = quarantine.split_rows(customers_df, signup_date.isna(), reason="coerce:signup_date")
+    customers_df["signup_date"] = signup_date
 
-    customers_df = validate_post_customer_schema(customers_df)
+    if quarantine is None:
+        customers_df = validate_post_customer_schema(customers_df)
+    else:
+        customers_df = quarantine.validate(customers_df, get_post_customer_schema())
+        quarantine.check_ratio(total_rows)
 
     logging.info(f"Cleaned customer data {len(customers_df)} rows")
+    if ledger is not None:
+        ledger.record("clean_customers_data", total_rows, customers_df, started, null_dropped=null_dropped,
+                      rejected=quarantine.rejected_rows if quarantine else 0)
     return customers_df
 
-def clean_products_data(products_df: pd.DataFrame) -> pd.DataFrame:
+def clean_products_data(products_df: pd.DataFrame, quarantine: Quarantine | None = None,
+                        ledger: LineageLedger | None = None) -> pd.DataFrame:
     """
-    Remove missing values and standardization columns
+    Remove missing values and standardization columns, with a quarantine bad rows are rejected instead
     """
     logging.info(f"Cleaning product data from {len(products_df)} rows")
+    started = time.perf_counter()
+    total_rows = len(products_df)
 
     products_df = validate_pre_products_schema(products_df)
 
-    products_df = cleaning_fun(products_df)
+    products_df = cleaning_fun(products_df, quarantine)
+    null_dropped = total_rows - len(products_df) if quarantine is None else 0
 
-    products_df = validate_post_products_schema(products_df)
+    if quarantine is None:
+        products_df = validate_post_products_schema(products_df)
+    else:
+        products_df = quarantine.validate(products_df, get_post_products_schema())
+        quarantine.check_ratio(total_rows)
 
     logging.info(f"Cleaned product data {len(products_df)} rows")
+    if ledger is not None:
+        ledger.record("clean_products_data", total_rows, products_df, started, null_dropped=null_dropped,
+                      rejected=quarantine.rejected_rows if quarantine else 0)
     return products_df
 
-def merge_data(sales_df: pd.DataFrame, customers_df: pd.DataFrame, products_df: pd.DataFrame) -> pd.DataFrame:
+def merge_data(sales_df: pd.DataFrame, customers_df: pd.DataFrame, products_df: pd.DataFrame,
+               ledger: LineageLedger | None = None) -> pd.DataFrame:
     """
     Merge sales, customers and products data
     """
     logging.info("Merge sales, customers and products data")
+    started = time.perf_counter()
     merged_df = sales_df.merge(customers_df, on="customer_id", how="inner").copy()
     merged_df = merged_df.merge(products_df, on="product_id", how="inner").copy()
     merged_df["profit_margin"] = merged_df["profit"] / merged_df["total_revenue"]
     logging.info(f"Merged sales, customers and products data")
+    if ledger is not None:
+        # sales rows the inner joins drop: no matching customer or product
+        matched = sales_df["customer_id"].isin(customers_df["customer_id"]) & \
+            sales_df["product_id"].isin(products_df["product_id"])
+        ledger.record("merge_data", len(sales_df), merged_df, started, join_dropped=(~matched).sum())
     return merged_df
 
-def compute_monthly_aggregates(merged_df: pd.DataFrame) -> pd.DataFrame:
+def compute_monthly_aggregates(merged_df: pd.DataFrame, ledger: LineageLedger | None = None) -> pd.DataFrame:
     """
     Aggregated data by month
     """
     logging.info("Computing monthly aggregates")
+    started = time.perf_counter()
 
     merged_df = validate_pre_aggregates_schema(merged_df)
 
@@ -101,42 +158,52 @@ def compute_monthly_aggregates(merged_df: pd.DataFrame) -> pd.DataFrame:
     aggregate_df = validate_post_aggregates_schema(aggregate_df)
 
     logging.info(f"Computed monthly aggregates on merged data")
+    if ledger is not None:
+        ledger.record("compute_monthly_aggregates", len(merged_df), aggregate_df, started, aggregated=True)
     return aggregate_df
 
-def segment_customers(sales_df: pd.DataFrame, customer_df: pd.DataFrame) -> pd.DataFrame:
+def segment_customers(sales_df: pd.DataFrame, customer_df: pd.DataFrame,
+                      ledger: LineageLedger | None = None) -> pd.DataFrame:
     """
     Segment customers based on their total spent
     """
     logging.info("Segment customers based on their total spent")
+    started = time.perf_counter()
     total_spent_df = sales_df.groupby("customer_id")["total_revenue"].sum().reset_index().copy()
     total_spent_df.rename(columns={"total_revenue": "total_spent"}, inplace=True)
 
     segmented_df = customer_df.merge(total_spent_df, on="customer_id", how="left").copy()
+    joined_rows = len(segmented_df)
 
     segmented_df.dropna(subset=["total_spent"], inplace=True)
+    # customers without any sale
+    null_dropped = joined_rows - len(segmented_df)
 
     segmented_df["customer_segment"] = pd.cut(
         segmented_df["total_spent"],
         bins=[0, 1000, 5000, 10000, float("inf")],
         labels=["Low", "Medium", "High", "VIP"],
-    )
+    ).astype(str)
 
-    segmented_df["segmentation_date"] = pd.to_datetime(customer_df["signup_date"], format="mixed", errors="coerce")
+    segmented_df["segmentation_date"] = pd.to_datetime(segmented_df["signup_date"], format="mixed", errors="coerce")
     allowed_columns = ["customer_id", "total_spent", "customer_segment", "segmentation_date"]
     df_segmented = drop_extra_columns(segmented_df, allowed_columns)
 
     df_segmented = validate_post_segmentation_schema(df_segmented)
 
     logging.info(f"Final segmented customers: {len(df_segmented)} rows")
+    if ledger is not None:
+        ledger.record("segment_customers", len(customer_df), df_segmented, started, null_dropped=null_dropped)
 
     return df_segmented
 
 
-def detect_sales_anomalies(sales_df: pd.DataFrame) -> pd.DataFrame:
+def detect_sales_anomalies(sales_df: pd.DataFrame, ledger: LineageLedger | None = None) -> pd.DataFrame:
     """
     Detect sales anomalies
     """
     logging.info("Detecting sales anomalies")
+    started = time.perf_counter()
     threshold = sales_df["total_revenue"].mean() + (3 * sales_df["total_revenue"].std())
 
     anomalies_df = sales_df[sales_df["total_revenue"] > threshold].copy()
@@ -148,14 +215,19 @@ def detect_sales_anomalies(sales_df: pd.DataFrame) -> pd.DataFrame:
     df_anomalies = validate_post_anomalies_schema(df_anomalies)
 
     logging.info(f"Final anomalies: {len(df_anomalies)} rows")
+    if ledger is not None:
+        ledger.record("detect_sales_anomalies", len(sales_df), df_anomalies, started,
+                      filtered=len(sales_df) - len(df_anomalies))
 
     return df_anomalies
 
-def forecast_sales(sales_df: pd.DataFrame) -> pd.DataFrame:
+def forecast_sales(sales_df: pd.DataFrame, ledger: LineageLedger | None = None) -> pd.DataFrame:
     """
     Sales forecast for 7 dayys mean
     """
     logging.info("Forecasting sales")
+    started = time.perf_counter()
+    input_rows = len(sales_df)
 
     sales_df["order_date"] = pd.to_datetime(sales_df["order_date"], format="mixed", errors="coerce")
     sales_df.set_index("order_date", inplace=True)
@@ -167,6 +239,8 @@ def forecast_sales(sales_df: pd.DataFrame) -> pd.DataFrame:
     sales_df = validate_post_sales_forecast_schema(sales_df)
 
     logging.info(f"forecast sales: {len(sales_df)} rows")
+    if ledger is not None:
+        ledger.record("forecast_sales", input_rows, sales_df, started)
 
     return sales_df
 
@@ -0,0 +1,204 @@
+import time
+from functools import lru_cache
+from pathlib import Path
+
+import duckdb
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from ..logger import setup_logger
+from .lineage import LineageLedger
+# cleaning and the three-way merge stay on pandas, only the analytics run as SQL
+from .transform import clean_customers_data, clean_products_data, clean_sales_data, merge_data  # noqa: F401
+from ..validations.aggregates_schema import validate_pre_aggregates_schema, validate_post_aggregates_schema
+from ..validations.anomalies_schema import validate_post_anomalies_schema
+from ..validations.forecast_schema import validate_post_sales_forecast_schema
+from ..validations.segment_schema import validate_post_segmentation_schema
+
+logging = setup_logger("etl.transform_duckdb")
+
+# DuckDB engine: the analytics are the queries in include/sql, run by an in-process DuckDB over the registered
+# cleaned frames. The same files are the offline reference for the Snowflake-side SQL.
+SQL_DIR = Path(__file__).resolve().parent.parent / "sql"
+
+# Row order of a registered table, the window and filter queries keep pandas' row order with it
+ROW_ID_COLUMN = "row_id"
+
+# Columns parsed like the pandas engine (format="mixed") when they arrive as strings (e.g. from XCom JSON)
+DATE_COLUMNS = ["order_date", "signup_date"]
+
+# memory_limit / temp_directory / threads from the `duckdb` section of config.yaml, set through engine.get_engine
+settings = {}
+
+
+def configure(options: dict | None):
+    settings.clear()
+    settings.update({key: value for key, value in (options or {}).items() if value is not None})
+
+
+@lru_cache(maxsize=None)
+def load_query(name: str) -> str:
+    return (SQL_DIR / f"{name}.sql").read_text()
+
+
+class DuckDBSession:
+    """
+    In-process DuckDB with frames, Arrow tables or Parquet files registered as tables, queries come back as Arrow
+    """
+
+    def __init__(self, memory_limit: str | None = None, temp_directory: str | None = None,
+                 threads: int | None = None):
+        self.connection = duckdb.connect()
+        # above memory_limit joins, aggregates and sorts spill to temp_directory instead of failing the task
+        if memory_limit:
+            self.connection.execute(f"SET memory_limit = '{memory_limit}'")
+        if temp_directory:
+            self.connection.execute(f"SET temp_directory = '{temp_directory}'")
+        if threads:
+            self.connection.execute(f"SET threads = {int(threads)}")
+
+    @classmethod
+    def from_settings(cls) -> "DuckDBSession":
+        return cls(**settings)
+
+    def __enter__(self) -> "DuckDBSession":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.connection.close()
+
+    def register(self, name: str, source: pd.DataFrame | pa.Table | str):
+        """
+        Register a pandas frame, an Arrow table or a Parquet path / glob as `name`, plus its row_id
+        """
+        if isinstance(source, str):
+            self.connection.sql(
+                f"SELECT * EXCLUDE (filename, file_row_number), "
+                f"ROW_NUMBER() OVER (ORDER BY filename, file_row_number) - 1 AS {ROW_ID_COLUMN} "
+                f"FROM read_parquet($path, filename = true, file_row_number = true)",
+                params={"path": source},
+            ).create_view(name)
+            return
+
+        if isinstance(source, pd.DataFrame):
+            source = pa.Table.from_pandas(parse_date_columns(source), preserve_index=False)
+        # Arrow buffers are scanned in place, only the row_id column is new
+        source = source.append_column(ROW_ID_COLUMN, pa.array(np.arange(source.num_rows, dtype=np.int64)))
+        self.connection.register(name, source)
+
+    def query(self, name: str) -> pa.Table:
+        """
+        Run include/sql/<name>.sql
+        """
+        return self.connection.execute(load_query(name)).to_arrow_table()
+
+
+def parse_date_columns(df: pd.DataFrame) -> pd.DataFrame:
+    to_parse = [column for column in DATE_COLUMNS if column in df.columns and df[column].dtype == object]
+    if not to_parse:
+        return df
+    return df.assign(**{
+        column: pd.to_datetime(df[column], format="mixed", errors="coerce") for column in to_parse
+    })
+
+
+def run_query(name: str, tables: dict) -> pa.Table:
+    """
+    Register `tables` in a fresh session and run include/sql/<name>.sql, the result stays Arrow
+    """
+    with DuckDBSession.from_settings() as session:
+        for table, source in tables.items():
+            session.register(table, source)
+        return session.query(name)
+
+
+def to_pandas(table: pa.Table) -> pd.DataFrame:
+    # nanosecond timestamps like the other engines, pandera and the loaders work on pandas
+    return table.to_pandas(coerce_temporal_nanoseconds=True)
+
+
+def compute_monthly_aggregates(merged_df: pd.DataFrame, ledger: LineageLedger | None = None) -> pd.DataFrame:
+    """
+    Aggregated data by month
+    """
+    logging.info("Computing monthly aggregates")
+    started = time.perf_counter()
+
+    merged_df = validate_pre_aggregates_schema(merged_df)
+
+    aggregate_df = to_pandas(run_query("monthly_aggregates", {
+        "merged": merged_df[["order_date", "total_revenue", "customer_id"]],
+    }))
+
+    aggregate_df = validate_post_aggregates_schema(aggregate_df)
+
+    logging.info(f"Computed monthly aggregates on merged data")
+    if ledger is not None:
+        ledger.record("compute_monthly_aggregates", len(merged_df), aggregate_df, started, aggregated=True)
+    return aggregate_df
+
+
+def segment_customers(sales_df: pd.DataFrame, customer_df: pd.DataFrame,
+                      ledger: LineageLedger | None = None) -> pd.DataFrame:
+    """
+    Segment customers based on their total spent
+    """
+    logging.info("Segment customers based on their total spent")
+    started = time.perf_counter()
+
+    df_segmented = to_pandas(run_query("segment_customers", {
+        "sales": sales_df[["customer_id", "total_revenue"]],
+        "customers": customer_df[["customer_id", "signup_date"]],
+    }))
+
+    df_segmented = validate_post_segmentation_schema(df_segmented)
+
+    logging.info(f"Final segmented customers: {len(df_segmented)} rows")
+    if ledger is not None:
+        # customers without any sale
+        ledger.record("segment_customers", len(customer_df), df_segmented, started,
+                      null_dropped=len(customer_df) - len(df_segmented))
+
+    return df_segmented
+
+
+def detect_sales_anomalies(sales_df: pd.DataFrame, ledger: LineageLedger | None = None) -> pd.DataFrame:
+    """
+    Detect sales anomalies
+    """
+    logging.info("Detecting sales anomalies")
+    started = time.perf_counter()
+
+    allowed_columns = ["order_id", "customer_id", "product_id", "order_date", "total_revenue"]
+    df_anomalies = to_pandas(run_query("sales_anomalies", {"sales": sales_df[allowed_columns]}))
+    # same column order as the input, like drop_extra_columns
+    df_anomalies = df_anomalies[[column for column in sales_df.columns if column in allowed_columns]]
+
+    df_anomalies = validate_post_anomalies_schema(df_anomalies)
+
+    logging.info(f"Final anomalies: {len(df_anomalies)} rows")
+    if ledger is not None:
+        ledger.record("detect_sales_anomalies", len(sales_df), df_anomalies, started,
+                      filtered=len(sales_df) - len(df_anomalies))
+
+    return df_anomalies
+
+
+def forecast_sales(sales_df: pd.DataFrame, ledger: LineageLedger | None = None) -> pd.DataFrame:
+    """
+    Sales forecast for 7 dayys mean
+    """
+    logging.info("Forecasting sales")
+    started = time.perf_counter()
+    input_rows = len(sales_df)
+
+    sales_df = to_pandas(run_query("sales_forecast", {"sales": sales_df[["order_date", "total_revenue"]]}))
+
+    sales_df = validate_post_sales_forecast_schema(sales_df)
+
+    logging.info(f"forecast sales: {len(sales_df)} rows")
+    if ledger is not None:
+        ledger.record("forecast_sales", input_rows, sales_df, started)
+
+    return sales_df
@@ -0,0 +1,367 @@
+import time
+
+import pandas as pd
+import polars as pl
+
+from ..logger import setup_logger
+from .lineage import LineageLedger
+from .quarantine import Quarantine
+from .transform import drop_extra_columns
+from ..validations.aggregates_schema import validate_pre_aggregates_schema, validate_post_aggregates_schema
+from ..validations.anomalies_schema import validate_post_anomalies_schema
+from ..validations.customers_schema import validate_pre_customers_schema, validate_post_customer_schema, \
+    get_post_customer_schema
+from ..validations.forecast_schema import validate_post_sales_forecast_schema
+from ..validations.products_schema import validate_pre_products_schema, validate_post_products_schema, \
+    get_post_products_schema
+from ..validations.sales_schema import validate_pre_sales_schema, validate_post_sales_schema, get_post_sales_schema
+from ..validations.segment_schema import validate_post_segmentation_schema
+
+logging = setup_logger("etl.transform_polars")
+
+# Polars engine: same functions, same pandas frames in and out (XCom, pandera and the loaders stay pandas).
+# Every stage is one lazy plan over only the columns it computes on (numbers and datetimes cross without a copy),
+# string columns are never converted: the rows the plan picks are gathered back from the pandas frames.
+
+# Same right-closed bins as pd.cut in transform.segment_customers: (0, 1000] is Low, ... (10000, inf) is VIP
+SEGMENT_BINS = [0, 1000, 5000, 10000, float("inf")]
+SEGMENT_LABELS = ["Low", "Medium", "High", "VIP"]
+
+# Dates the transforms write to XCom (to_json date_format="iso"), the fraction is optional
+ISO_FORMAT = "%Y-%m-%dT%H:%M:%S%.f"
+
+
+def iso_dates(column: str, dtype: pl.DataType) -> pl.Expr:
+    """
+    Polars' own parser for the ISO dates read back from XCom, a column that already holds datetimes is kept.
+    Values in any other format become null
+    """
+    if dtype == pl.Datetime:
+        return pl.col(column)
+    return pl.col(column).cast(pl.String).str.to_datetime(ISO_FORMAT, time_unit="ns", strict=False)
+
+
+def parse_dates(df: pl.DataFrame, column: str) -> pl.Series:
+    """
+    Raw files mix date formats (clean_* only): ISO values are parsed natively, the rest goes through pandas
+    format="mixed", which guesses the format of every value and has no Polars equivalent
+    """
+    parsed = df.select(iso_dates(column, df.schema[column])).to_series()
+    rest = parsed.is_null() & df[column].is_not_null()
+    if rest.any():
+        fallback = pd.to_datetime(df.filter(rest)[column].to_pandas(), format="mixed", errors="coerce")
+        parsed = parsed.scatter(rest.arg_true(), pl.from_pandas(fallback).cast(parsed.dtype))
+    return parsed
+
+
+def lazy_frame(df: pd.DataFrame, columns: list, dates: list | None = None,
+               row_index: str | None = None) -> pl.LazyFrame:
+    """
+    Plan over only `columns` of a pandas frame, `dates` parsed from ISO strings and `row_index` the pandas row
+    positions to gather the other columns back with
+    """
+    frame = pl.from_pandas(df[columns]).lazy()
+    if dates:
+        schema = frame.collect_schema()
+        frame = frame.with_columns(iso_dates(column, schema[column]) for column in dates)
+    return frame.with_row_index(row_index) if row_index else frame
+
+
+def take_rows(df: pd.DataFrame, rows: pl.Series) -> pd.DataFrame:
+    return df.take(rows.to_numpy()).reset_index(drop=True)
+
+
+def split_nulls(df: pl.DataFrame, quarantine: Quarantine | None, reason: str = "null",
+                columns: list | None = None) -> pl.DataFrame:
+    """
+    Drop the rows with a null in `columns` (all columns by default), with a quarantine they are rejected instead
+    """
+    has_null = pl.any_horizontal(pl.col(columns).is_null() if columns else pl.all().is_null())
+    if quarantine is not None:
+        # the bad rows only go through the pandas quarantine so reasons match the pandas engine
+        quarantine.split_nulls(df.filter(has_null).to_pandas(), reason=reason, columns=columns)
+    return df.filter(~has_null)
+
+
+def split_rows(df: pl.DataFrame, bad: pl.Series, quarantine: Quarantine, reason: str) -> pl.DataFrame:
+    """
+    Reject the rows flagged in `bad` as they are, with the same `reason` for all of them
+    """
+    rejected = df.filter(bad).to_pandas()
+    quarantine.split_rows(rejected, pd.Series(True, index=rejected.index), reason=reason)
+    return df.filter(~bad)
+
+
+def cleaning_fun(my_df: pd.DataFrame, quarantine: Quarantine | None = None) -> pl.DataFrame:
+    df = pl.from_pandas(my_df).rename(lambda column: column.lower().replace(" ", "_"))
+    return split_nulls(df, quarantine)
+
+
+def clean_sales_data(sales_df: pd.DataFrame, quarantine: Quarantine | None = None,
+                     ledger: LineageLedger | None = None) -> pd.DataFrame:
+    """
+    Remove missing values and standartisation columns, with a quarantine bad rows are rejected instead
+    """
+    logging.info(f"Cleaning sales data from {len(sales_df)} rows")
+    started = time.perf_counter()
+    total_rows = len(sales_df)
+
+    sales_df = validate_pre_sales_schema(sales_df)
+
+    sales = cleaning_fun(sales_df, quarantine)
+    null_dropped = total_rows - sales.height if quarantine is None else 0
+    order_date = parse_dates(sales, "order_date")
+    if quarantine is not None:
+        # the raw value is rejected, not the null it was parsed to
+        unparsed = order_date.is_null()
+        sales = split_rows(sales, unparsed, quarantine, reason="coerce:order_date")
+        order_date = order_date.filter(~unparsed)
+    sales = sales.with_columns(order_date)
+    sales_df = sales.with_columns((pl.col("amount") * pl.col("quantity")).alias("total_revenue")).to_pandas()
+
+    if quarantine is None:
+        sales_df = validate_post_sales_schema(sales_df)
+    else:
+        sales_df = quarantine.validate(sales_df, get_post_sales_schema())
+        quarantine.check_ratio(total_rows)
+
+    logging.info(f"Cleaned sales data {len(sales_df)} rows")
+    if ledger is not None:
+        ledger.record("clean_sales_data", total_rows, sales_df, started, null_dropped=null_dropped,
+                      rejected=quarantine.rejected_rows if quarantine else 0)
+    return sales_df
+
+
+def clean_customers_data(customers_df: pd.DataFrame, quarantine: Quarantine | None = None,
+                         ledger: LineageLedger | None = None) -> pd.DataFrame:
+    """
+    Remove missing values and standardization columns, with a quarantine bad rows are rejected instead
+    """
+    logging.info(f"Cleaning customer data from {len(customers_df)} rows")
+    started = time.perf_counter()
+    total_rows = len(customers_df)
+
+    customers_df = validate_pre_customers_schema(customers_df)
+
+    customers = cleaning_fun(customers_df, quarantine)
+    null_dropped = total_rows - customers.height if quarantine is None else 0
+    signup_date = parse_dates(customers, "signup_date")
+    if quarantine is not None:
+        unparsed = signup_date.is_null()
+        customers = split_rows(customers, unparsed, quarantine, reason="coerce:signup_date")
+        signup_date = signup_date.filter(~unparsed)
+    customers = customers.with_columns(signup_date)
+    customers_df = customers.to_pandas()
+
+    if quarantine is None:
+        customers_df = validate_post_customer_schema(customers_df)
+    else:
+        customers_df = quarantine.validate(customers_df, get_post_customer_schema())
+        quarantine.check_ratio(total_rows)
+
+    logging.info(f"Cleaned customer data {len(customers_df)} rows")
+    if ledger is not None:
+        ledger.record("clean_customers_data", total_rows, customers_df, started, null_dropped=null_dropped,
+                      rejected=quarantine.rejected_rows if quarantine else 0)
+    return customers_df
+
+
+def clean_products_data(products_df: pd.DataFrame, quarantine: Quarantine | None = None,
+                        ledger: LineageLedger | None = None) -> pd.DataFrame:
+    """
+    Remove missing values and standardization columns, with a quarantine bad rows are rejected instead
+    """
+    logging.info(f"Cleaning product data from {len(products_df)} rows")
+    started = time.perf_counter()
+    total_rows = len(products_df)
+
+    products_df = validate_pre_products_schema(products_df)
+
+    products = cleaning_fun(products_df, quarantine)
+    null_dropped = total_rows - products.height if quarantine is None else 0
+    products_df = products.to_pandas()
+
+    if quarantine is None:
+        products_df = validate_post_products_schema(products_df)
+    else:
+        products_df = quarantine.validate(products_df, get_post_products_schema())
+        quarantine.check_ratio(total_rows)
+
+    logging.info(f"Cleaned product data {len(products_df)} rows")
+    if ledger is not None:
+        ledger.record("clean_products_data", total_rows, products_df, started, null_dropped=null_dropped,
+                      rejected=quarantine.rejected_rows if quarantine else 0)
+    return products_df
+
+
+def inner_join_columns(left: pd.DataFrame, right: pd.DataFrame, on: str) -> pd.DataFrame:
+    """
+    pandas merge(how="inner") columns of two row-aligned frames: the key once, overlapping columns suffixed _x / _y
+    """
+    overlap = left.columns.intersection(right.columns).drop(on)
+    left = left.rename(columns={column: f"{column}_x" for column in overlap})
+    right = right.drop(columns=on).rename(columns={column: f"{column}_y" for column in overlap})
+    return pd.concat([left, right], axis=1)
+
+
+def merge_data(sales_df: pd.DataFrame, customers_df: pd.DataFrame, products_df: pd.DataFrame,
+               ledger: LineageLedger | None = None) -> pd.DataFrame:
+    """
+    Merge sales, customers and products data
+    """
+    logging.info("Merge sales, customers and products data")
+    started = time.perf_counter()
+    # the joins run on the keys only, left row order kept like pandas merge(how="inner")
+    rows = lazy_frame(sales_df, ["customer_id", "product_id", "profit", "total_revenue"], row_index="sales_row").join(
+        lazy_frame(customers_df, ["customer_id"], row_index="customers_row"),
+        on="customer_id", how="inner", maintain_order="left",
+    ).join(
+        lazy_frame(products_df, ["product_id"], row_index="products_row"),
+        on="product_id", how="inner", maintain_order="left",
+    ).select(
+        "sales_row", "customers_row", "products_row",
+        (pl.col("profit") / pl.col("total_revenue")).alias("profit_margin"),
+    ).collect()
+
+    merged_df = inner_join_columns(take_rows(sales_df, rows["sales_row"]),
+                                   take_rows(customers_df, rows["customers_row"]), on="customer_id")
+    merged_df = inner_join_columns(merged_df, take_rows(products_df, rows["products_row"]), on="product_id")
+    merged_df["profit_margin"] = rows["profit_margin"].to_numpy()
+    logging.info(f"Merged sales, customers and products data")
+    if ledger is not None:
+        matched = sales_df["customer_id"].isin(customers_df["customer_id"]) & \
+            sales_df["product_id"].isin(products_df["product_id"])
+        ledger.record("merge_data", len(sales_df), merged_df, started, join_dropped=(~matched).sum())
+    return merged_df
+
+
+def compute_monthly_aggregates(merged_df: pd.DataFrame, ledger: LineageLedger | None = None) -> pd.DataFrame:
+    """
+    Aggregated data by month
+    """
+    logging.info("Computing monthly aggregates")
+    started = time.perf_counter()
+
+    merged_df = validate_pre_aggregates_schema(merged_df)
+
+    merged = lazy_frame(merged_df, ["order_date", "total_revenue", "customer_id"], dates=["order_date"])
+    aggregates = merged.drop_nulls("order_date").group_by(pl.col("order_date").dt.truncate("1mo").alias("month")).agg(
+        pl.col("total_revenue").sum().alias("total_sales"),
+        pl.col("customer_id").n_unique().cast(pl.Int64).alias("unique_customers"),
+    ).collect()
+
+    if not aggregates.is_empty():
+        # pd.Grouper(freq="M") also emits the months without any order, with 0 sales and 0 customers
+        dtype = aggregates.schema["month"]
+        months = pl.datetime_range(
+            aggregates["month"].min(), aggregates["month"].max(), interval="1mo", eager=True,
+            time_unit=dtype.time_unit, time_zone=dtype.time_zone,
+        )
+        aggregates = pl.DataFrame({"month": months}).join(aggregates, on="month", how="left").with_columns(
+            pl.col("total_sales").fill_null(0.0),
+            pl.col("unique_customers").fill_null(0),
+        )
+    # ... and labels every month with its last day at midnight
+    aggregate_df = aggregates.sort("month").select(
+        pl.col("month").dt.month_end().alias("order_date"), "total_sales", "unique_customers",
+    ).to_pandas()
+
+    aggregate_df = validate_post_aggregates_schema(aggregate_df)
+
+    logging.info(f"Computed monthly aggregates on merged data")
+    if ledger is not None:
+        ledger.record("compute_monthly_aggregates", len(merged_df), aggregate_df, started, aggregated=True)
+    return aggregate_df
+
+
+def segment_expression(column: str) -> pl.Expr:
+    spent = pl.col(column)
+    expression = pl.when(spent <= SEGMENT_BINS[0]).then(pl.lit(None, dtype=pl.String))
+    for upper, label in zip(SEGMENT_BINS[1:], SEGMENT_LABELS):
+        expression = expression.when(spent <= upper).then(pl.lit(label))
+    return expression.otherwise(pl.lit(None, dtype=pl.String))
+
+
+def segment_customers(sales_df: pd.DataFrame, customer_df: pd.DataFrame,
+                      ledger: LineageLedger | None = None) -> pd.DataFrame:
+    """
+    Segment customers based on their total spent
+    """
+    logging.info("Segment customers based on their total spent")
+    started = time.perf_counter()
+    total_spent = lazy_frame(sales_df, ["customer_id", "total_revenue"]).group_by("customer_id").agg(
+        pl.col("total_revenue").sum().alias("total_spent")
+    )
+    segmented = lazy_frame(customer_df, ["customer_id", "signup_date"], dates=["signup_date"]).join(
+        total_spent, on="customer_id", how="left", maintain_order="left"
+    ).collect()
+    joined_rows = segmented.height
+
+    segmented = segmented.filter(pl.col("total_spent").is_not_null())
+    # customers without any sale
+    null_dropped = joined_rows - segmented.height
+
+    df_segmented = segmented.select(
+        "customer_id",
+        "total_spent",
+        segment_expression("total_spent").alias("customer_segment"),
+        pl.col("signup_date").alias("segmentation_date"),
+    ).to_pandas()
+
+    df_segmented = validate_post_segmentation_schema(df_segmented)
+
+    logging.info(f"Final segmented customers: {len(df_segmented)} rows")
+    if ledger is not None:
+        ledger.record("segment_customers", len(customer_df), df_segmented, started, null_dropped=null_dropped)
+
+    return df_segmented
+
+
+def detect_sales_anomalies(sales_df: pd.DataFrame, ledger: LineageLedger | None = None) -> pd.DataFrame:
+    """
+    Detect sales anomalies
+    """
+    logging.info("Detecting sales anomalies")
+    started = time.perf_counter()
+    revenue = pl.col("total_revenue")
+    # std is the sample standard deviation (ddof=1) in both engines
+    rows = lazy_frame(sales_df, ["total_revenue"], row_index="row").filter(
+        revenue > revenue.mean() + 3 * revenue.std()
+    ).collect()
+
+    allowed_columns = ["order_id", "customer_id", "product_id", "order_date", "total_revenue"]
+    df_anomalies = drop_extra_columns(take_rows(sales_df, rows["row"]), allowed_columns)
+    # only the anomalies' dates are parsed
+    df_anomalies["order_date"] = lazy_frame(df_anomalies, ["order_date"], dates=["order_date"]).collect() \
+        .to_series().to_pandas()
+
+    df_anomalies = validate_post_anomalies_schema(df_anomalies)
+
+    logging.info(f"Final anomalies: {len(df_anomalies)} rows")
+    if ledger is not None:
+        ledger.record("detect_sales_anomalies", len(sales_df), df_anomalies, started,
+                      filtered=len(sales_df) - len(df_anomalies))
+
+    return df_anomalies
+
+
+def forecast_sales(sales_df: pd.DataFrame, ledger: LineageLedger | None = None) -> pd.DataFrame:
+    """
+    Sales forecast for 7 dayys mean
+    """
+    logging.info("Forecasting sales")
+    started = time.perf_counter()
+    input_rows = len(sales_df)
+
+    # rolling over the last 7 rows in their current order, like pandas rolling(window=7) on the order_date index
+    sales_df = lazy_frame(sales_df, ["order_date", "total_revenue"], dates=["order_date"]).with_columns(
+        pl.col("total_revenue").rolling_mean(window_size=7, min_samples=1).alias("sales_forecast"),
+    ).collect().to_pandas()
+
+    sales_df = validate_post_sales_forecast_schema(sales_df)
+
+    logging.info(f"forecast sales: {len(sales_df)} rows")
+    if ledger is not None:
+        ledger.record("forecast_sales", input_rows, sales_df, started)
+
+    return sales_df
@@ -0,0 +1,27 @@
+-- Monthly sales and distinct customers of the merged orders, labelled with the last day of the month.
+-- Months without orders are kept with 0 sales and 0 customers, like pd.Grouper(freq="M").
+WITH RECURSIVE monthly AS (
+    SELECT
+        LAST_DAY(order_date) AS month_end,
+        SUM(total_revenue) AS total_sales,
+        COUNT(DISTINCT customer_id) AS unique_customers
+    FROM merged
+    WHERE order_date IS NOT NULL
+    GROUP BY LAST_DAY(order_date)
+),
+months AS (
+    SELECT MIN(DATE_TRUNC('month', order_date)) AS month_start
+    FROM merged
+    UNION ALL
+    SELECT month_start + INTERVAL '1 month'
+    FROM months
+    WHERE month_start < (SELECT MAX(DATE_TRUNC('month', order_date)) FROM merged)
+)
+SELECT
+    CAST(LAST_DAY(months.month_start) AS TIMESTAMP) AS order_date,
+    COALESCE(monthly.total_sales, 0.0) AS total_sales,
+    COALESCE(monthly.unique_customers, 0) AS unique_customers
+FROM months
+LEFT JOIN monthly ON monthly.month_end = LAST_DAY(months.month_start)
+WHERE months.month_start IS NOT NULL
+ORDER BY order_date
@@ -0,0 +1,5 @@
+-- Orders whose revenue is above the mean plus 3 sample standard deviations.
+SELECT order_id, customer_id, product_id, order_date, total_revenue
+FROM sales
+WHERE total_revenue > (SELECT AVG(total_revenue) + 3 * STDDEV_SAMP(total_revenue) FROM sales)
+ORDER BY row_id
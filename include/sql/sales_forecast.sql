@@ -0,0 +1,8 @@
+-- Mean revenue of the last 7 orders, over the rows in the order they were loaded (row_id),
+-- like pandas rolling(window=7, min_periods=1). A Snowflake table has no row order, order by order_date there.
+SELECT
+    order_date,
+    total_revenue,
+    AVG(total_revenue) OVER (ORDER BY row_id ROWS BETWEEN 6 PRECEDING AND CURRENT ROW) AS sales_forecast
+FROM sales
+ORDER BY row_id
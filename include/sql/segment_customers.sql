@@ -0,0 +1,21 @@
+-- Customers with at least one order, segmented on their total spent with the right-closed bins of pd.cut:
+-- (0, 1000] Low, (1000, 5000] Medium, (5000, 10000] High, above VIP.
+WITH spent AS (
+    SELECT customer_id, SUM(total_revenue) AS total_spent
+    FROM sales
+    GROUP BY customer_id
+)
+SELECT
+    customers.customer_id,
+    spent.total_spent,
+    CASE
+        WHEN spent.total_spent <= 0 THEN NULL
+        WHEN spent.total_spent <= 1000 THEN 'Low'
+        WHEN spent.total_spent <= 5000 THEN 'Medium'
+        WHEN spent.total_spent <= 10000 THEN 'High'
+        ELSE 'VIP'
+    END AS customer_segment,
+    customers.signup_date AS segmentation_date
+FROM customers
+JOIN spent ON spent.customer_id = customers.customer_id
+ORDER BY customers.row_id
@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 import pandas as pd
 import pandera.pandas as pa
 
@@ -7,11 +9,13 @@ from pandera.errors import SchemaError
 from .. logger import setup_logger
 logging = setup_logger("etl.validation.forecast")
 
-forecast_sales_schema = pa.DataFrameSchema({
-    "order_date": Column(pa.DateTime),
-    "total_revenue": Column(float, Check.greater_than_or_equal_to(0)),
-    "sales_forecast": Column(float, Check.greater_than_or_equal_to(0))
-})
+@lru_cache(maxsize=None)
+def get_forecast_sales_schema() -> pa.DataFrameSchema:
+    return pa.DataFrameSchema({
+        "order_date": Column(pa.DateTime),
+        "total_revenue": Column(float, Check.greater_than_or_equal_to(0)),
+        "sales_forecast": Column(float, Check.greater_than_or_equal_to(0))
+    })
 
 def validate_post_sales_forecast_schema(df: pd.DataFrame) -> pd.DataFrame:
-    return forecast_sales_schema.validate(df)
\ No newline at end of file
+    return get_forecast_sales_schema().validate(df)
\ No newline at end of file
@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 import pandas as pd
 import pandera.pandas as pa
 
@@ -7,12 +9,28 @@ from pandera.errors import SchemaError
 from .. logger import setup_logger
 logging = setup_logger("etl.validation_customers")
 
-segment_customers_schema = pa.DataFrameSchema({
-    "customer_id": Column(int, Check.greater_than(0), unique=True),
-    "total_spent": Column(float, Check.greater_than_or_equal_to(0)),
-    "customer_segment": Column(str, Check.isin(["Low", "Medium", "High", "VIP"])),
-    "segmentation_date": Column(pa.DateTime)
-})
+@lru_cache(maxsize=None)
+def get_segment_customers_schema() -> pa.DataFrameSchema:
+    return pa.DataFrameSchema({
+        "customer_id": Column(int, Check.greater_than(0), unique=True),
+        "total_spent": Column(float, Check.greater_than_or_equal_to(0)),
+        "customer_segment": Column(str, Check.isin(["Low", "Medium", "High", "VIP"])),
+        "segmentation_date": Column(pa.DateTime)
+    })
 
 def validate_post_segmentation_schema(df: pd.DataFrame) -> pd.DataFrame:
-    return segment_customers_schema.validate(df)
\ No newline at end of file
+    return get_segment_customers_schema().validate(df)
+
+@lru_cache(maxsize=None)
+def get_backfill_segment_customers_schema() -> pa.DataFrameSchema:
+    # a customer gets one segment per logical date
+    return pa.DataFrameSchema({
+        "logical_date": Column(pa.DateTime),
+        "customer_id": Column(int, Check.greater_than(0)),
+        "total_spent": Column(float, Check.greater_than_or_equal_to(0)),
+        "customer_segment": Column(str, Check.isin(["Low", "Medium", "High", "VIP"])),
+        "segmentation_date": Column(pa.DateTime)
+    }, unique=["logical_date", "customer_id"])
+
+def validate_backfill_segmentation_schema(df: pd.DataFrame) -> pd.DataFrame:
+    return get_backfill_segment_customers_schema().validate(df)
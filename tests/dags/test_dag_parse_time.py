@@ -0,0 +1,72 @@
+"""DAG parse-time benchmark. The scheduler re-parses the DAG files constantly, so this test keeps their parse time under a budget and makes sure heavy libraries are only imported inside task bodies."""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+from airflow.models import DagBag
+
+DAG_FILES = sorted((Path(__file__).resolve().parents[2] / "dags").glob("*.py"))
+
+# Seconds allowed for one parse of the DAG file, override with DAG_PARSE_TIME_BUDGET for slower CI runners
+PARSE_TIME_BUDGET = float(os.environ.get("DAG_PARSE_TIME_BUDGET", "2.0"))
+PARSE_ROUNDS = 5
+
+HEAVY_MODULES = [
+    "pandas",
+    "pandera",
+    "polars",
+    "duckdb",
+    "include.etl.transform",
+    "airflow.providers.amazon.aws.hooks.s3",
+    "airflow.providers.snowflake.hooks.snowflake",
+]
+
+
+def parse_dag_file(dag_file):
+    dag_bag = DagBag(dag_folder=str(dag_file), include_examples=False)
+    assert not dag_bag.import_errors, dag_bag.import_errors
+    return dag_bag
+
+
+@pytest.mark.parametrize("dag_file", DAG_FILES, ids=[x.name for x in DAG_FILES])
+def test_dag_parse_time_within_budget(dag_file):
+    """
+    test if the DAG file parses within the budget (median of several rounds after a warm-up parse)
+    """
+    parse_dag_file(dag_file)
+
+    durations = []
+    for _ in range(PARSE_ROUNDS):
+        start = time.perf_counter()
+        parse_dag_file(dag_file)
+        durations.append(time.perf_counter() - start)
+
+    median = statistics.median(durations)
+    print(f"{dag_file.name} parse time: median {median:.3f}s, max {max(durations):.3f}s over {PARSE_ROUNDS} rounds")
+    assert median < PARSE_TIME_BUDGET, f"{dag_file.name} took {median:.3f}s to parse, budget is {PARSE_TIME_BUDGET}s"
+
+
+@pytest.mark.parametrize("dag_file", DAG_FILES, ids=[x.name for x in DAG_FILES])
+def test_dag_parse_does_not_import_heavy_modules(dag_file):
+    """
+    test if parsing the DAG file in a fresh interpreter leaves pandas, pandera and the hooks unimported
+    """
+    script = (
+        "import json, sys\n"
+        "from airflow.models import DagBag\n"
+        "import airflow.sdk\n"
+        "before = set(sys.modules)\n"
+        f"DagBag(dag_folder={str(dag_file)!r}, include_examples=False)\n"
+        "print(json.dumps(sorted(set(sys.modules) - before)))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+    loaded = set(json.loads(result.stdout.strip().splitlines()[-1]))
+
+    heavy = [module for module in HEAVY_MODULES if module in loaded]
+    assert not heavy, f"{dag_file.name} imports {heavy} at parse time"
@@ -0,0 +1,153 @@
+"""Tests that the grouped backfill matches the daily transforms run as of each logical date."""
+
+import pandas as pd
+import pytest
+
+from include.etl.backfill import LOGICAL_DATE_COLUMN, backfill_forecast_sales, backfill_monthly_aggregates, \
+    backfill_sales_anomalies, backfill_segment_customers, sales_up_to, write_partitioned, write_rejects
+from include.etl.quarantine import Quarantine
+from include.etl.transform import compute_monthly_aggregates, detect_sales_anomalies, forecast_sales, merge_data, \
+    segment_customers
+
+DATES = ["2026-01-30", "2026-01-31", "2026-02-01"]
+
+
+@pytest.fixture
+def sales():
+    rows = []
+    for day, date in enumerate(DATES):
+        for i in range(12):
+            revenue = 5000.0 if i == 11 and day != 1 else 10.0 + i + day
+            rows.append({
+                "order_id": f"{date}-{i}",
+                "customer_id": i % 4 + 1,
+                "product_id": i % 3 + 1,
+                "order_date": pd.Timestamp(f"{date} {i:02d}:00"),
+                "amount": revenue,
+                "quantity": 1,
+                "discount": 0.0,
+                "profit": revenue / 10,
+                "total_revenue": revenue,
+            })
+    return pd.DataFrame(rows)
+
+
+@pytest.fixture
+def customers():
+    return pd.DataFrame({
+        "customer_id": [1, 2, 3, 4],
+        "name": ["a", "b", "c", "d"],
+        "email": ["a@x.com", "b@x.com", "c@x.com", "d@x.com"],
+        "signup_date": pd.to_datetime(["2025-01-01", "2025-02-01", "2025-03-01", "2025-04-01"]),
+    })
+
+
+@pytest.fixture
+def products():
+    return pd.DataFrame({
+        "product_id": [1, 2, 3],
+        "product_name": ["p1", "p2", "p3"],
+        "category": ["c", "c", "d"],
+        "price": [1.0, 2.0, 3.0],
+    })
+
+
+def orders_up_to(df, date):
+    """
+    what the daily run of `date` reads: every order placed on or before that day
+    """
+    return df[df["order_date"].dt.normalize() <= pd.Timestamp(date)].reset_index(drop=True)
+
+
+def backfill_partition(df, date):
+    partition = df[df[LOGICAL_DATE_COLUMN] == pd.Timestamp(date)]
+    return partition.drop(columns=LOGICAL_DATE_COLUMN).reset_index(drop=True)
+
+
+def test_backfill_matches_daily_runs(sales, customers, products):
+    """
+    test if every logical date partition equals the daily transforms on the orders up to that date
+    """
+    start_date, end_date = DATES[0], DATES[-1]
+    merged = merge_data(sales_df=sales, customers_df=customers, products_df=products)
+
+    aggregates = backfill_monthly_aggregates(merged, start_date, end_date)
+    segments = backfill_segment_customers(sales, customers, start_date, end_date)
+    anomalies = backfill_sales_anomalies(sales, start_date, end_date)
+    forecast = backfill_forecast_sales(sales, end_date)
+
+    for date in DATES:
+        daily_sales = orders_up_to(sales, date)
+        daily_merged = merge_data(sales_df=daily_sales, customers_df=customers, products_df=products)
+
+        pd.testing.assert_frame_equal(backfill_partition(aggregates, date),
+                                      compute_monthly_aggregates(daily_merged).reset_index(drop=True))
+        pd.testing.assert_frame_equal(backfill_partition(segments, date),
+                                      segment_customers(daily_sales, customers).reset_index(drop=True))
+        pd.testing.assert_frame_equal(backfill_partition(anomalies, date),
+                                      detect_sales_anomalies(daily_sales).reset_index(drop=True))
+        # the forecast is written by order day, the view as of a date is every partition up to it
+        forecast_as_of = forecast[forecast[LOGICAL_DATE_COLUMN] <= pd.Timestamp(date)]
+        pd.testing.assert_frame_equal(forecast_as_of.drop(columns=LOGICAL_DATE_COLUMN).reset_index(drop=True),
+                                      forecast_sales(daily_sales.copy()).reset_index(drop=True))
+
+    # the 5000 order of the first day is an anomaly on its own date only, the later dates raise the threshold
+    assert backfill_partition(anomalies, DATES[0])["order_id"].tolist() == [f"{DATES[0]}-11"]
+    assert segments[segments["customer_id"] == 4]["customer_segment"].tolist() == ["High", "High", "VIP"]
+    assert len(forecast) == len(sales)
+
+
+def test_backfill_includes_orders_before_the_range(sales, customers):
+    """
+    test if a range starting after the first orders still counts them, and later orders are left out
+    """
+    visible = sales_up_to(sales, DATES[1])
+
+    segments = backfill_segment_customers(visible, customers, start_date=DATES[1], end_date=DATES[1])
+
+    assert len(visible) == 24
+    assert segments["total_spent"].sum() == pytest.approx(visible["total_revenue"].sum())
+
+
+def test_aggregates_keep_empty_months(customers, products):
+    """
+    test if a month without orders gets a zero row in every logical date after it, like the daily run
+    """
+    sales = pd.DataFrame({
+        "order_id": ["A", "B"],
+        "customer_id": [1, 2],
+        "product_id": [1, 2],
+        "order_date": pd.to_datetime(["2026-01-15", "2026-03-15"]),
+        "amount": [10.0, 20.0],
+        "quantity": [1, 1],
+        "discount": [0.0, 0.0],
+        "profit": [1.0, 2.0],
+        "total_revenue": [10.0, 20.0],
+    })
+
+    aggregates = backfill_monthly_aggregates(merge_data(sales_df=sales, customers_df=customers,
+                                                        products_df=products), "2026-03-14", "2026-03-15")
+
+    assert aggregates["order_date"].dt.month.tolist() == [1, 1, 2, 3]
+    assert aggregates["total_sales"].tolist() == [10.0, 10.0, 0.0, 20.0]
+
+
+def test_write_partitioned(tmp_path, sales):
+    forecast = backfill_forecast_sales(sales, end_date=DATES[-1])
+
+    write_partitioned(forecast, str(tmp_path / "forecast_sales"))
+    write_partitioned(forecast[forecast[LOGICAL_DATE_COLUMN] == pd.Timestamp(DATES[0])], str(tmp_path / "forecast_sales"))
+
+    partitions = sorted(p.name for p in (tmp_path / "forecast_sales").iterdir())
+    assert partitions == [f"{LOGICAL_DATE_COLUMN}={date}" for date in DATES]
+    assert len(pd.read_parquet(tmp_path / "forecast_sales")) == len(forecast)
+
+
+def test_write_rejects(tmp_path, sales):
+    quarantine = Quarantine("sales", max_reject_ratio=1.0)
+    quarantine.split_nulls(sales.assign(profit=[None] + [1.0] * (len(sales) - 1)))
+
+    write_rejects(quarantine.to_frame(), str(tmp_path / "sales.parquet"))
+
+    rejects = pd.read_parquet(tmp_path / "sales.parquet")
+    assert rejects[["dataset", "reject_reason"]].values.tolist() == [["sales", "null:profit"]]
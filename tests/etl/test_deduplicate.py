@@ -0,0 +1,50 @@
+"""Tests for the sales dedup stage."""
+
+import numpy as np
+import pandas as pd
+
+from include.etl.deduplicate import deduplicate_sales, hash_keys
+
+
+def make_sales(order_ids, order_dates):
+    return pd.DataFrame({
+        "Order ID": order_ids,
+        "Customer ID": range(1, len(order_ids) + 1),
+        "Order Date": order_dates,
+        "Amount": 10.0,
+    })
+
+
+def test_hash_keys_ignores_dtype():
+    """
+    test if the same key hashes the same whether it was read as int or str
+    """
+    as_int = pd.DataFrame({"order_id": [1001, 1002]})
+    as_str = pd.DataFrame({"order_id": ["1001", "1002"]})
+    np.testing.assert_array_equal(hash_keys(as_int, ["order_id"]), hash_keys(as_str, ["order_id"]))
+
+
+def test_drops_in_batch_duplicates():
+    """
+    test if a repeated order_id keeps only its first row and is reported
+    """
+    sales = make_sales(["A", "B", "A", "C", "B"], ["2026-01-01"] * 5)
+
+    deduplicated, report = deduplicate_sales(sales, key_columns=["order_id"])
+
+    assert deduplicated["Order ID"].tolist() == ["A", "B", "C"]
+    assert deduplicated["Customer ID"].tolist() == [1, 2, 4]
+    assert report == {"input_rows": 5, "dropped_in_batch": 2, "output_rows": 3}
+
+
+def test_null_keys_are_not_duplicates():
+    """
+    test if rows without an order_id are all kept for the quarantine instead of collapsing into one
+    """
+    sales = make_sales([None, "A", None, np.nan], ["2026-01-01"] * 4)
+
+    deduplicated, report = deduplicate_sales(sales, key_columns=["order_id"])
+
+    assert deduplicated["Customer ID"].tolist() == [1, 2, 3, 4]
+    assert report["dropped_in_batch"] == 0
+
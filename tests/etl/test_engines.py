@@ -0,0 +1,178 @@
+"""Parity tests for the pandas, Polars and DuckDB transform engines, plus an opt-in side-by-side benchmark."""
+
+import io
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from include.etl.engine import get_engine
+from include.etl.quarantine import Quarantine
+
+ENGINES = ["pandas", "polars", "duckdb"]
+
+# Rows of the synthetic sales frame for test_engine_benchmark, the benchmark is skipped when not set
+BENCHMARK_ROWS = int(os.environ.get("ENGINE_BENCHMARK_ROWS", "0"))
+
+DATE_FORMATS = ["%Y-%m-%d", "%m/%d/%Y %H:%M", "%Y-%m-%dT%H:%M:%S"]
+
+
+def make_raw_frames(rows: int, seed: int = 7):
+    """
+    Raw-looking sales, customers and products: upper case headers, mixed date formats, a few missing values,
+    orders of unknown products, customers without orders and an empty month (March)
+    """
+    rng = np.random.default_rng(seed)
+    months = rng.choice([1, 2, 4], size=rows)
+    days = rng.integers(1, 28, size=rows)
+    dates = pd.to_datetime({"year": 2026, "month": months, "day": days}) + pd.to_timedelta(rng.integers(0, 24, rows),
+                                                                                          unit="h")
+    formats = rng.integers(0, len(DATE_FORMATS), size=rows)
+    amount = rng.gamma(2.0, 150.0, size=rows).round(2)
+    amount[rng.choice(rows, size=max(rows // 200, 1), replace=False)] *= 100
+
+    sales = pd.DataFrame({
+        "ORDER ID": [f"O{i}" for i in range(rows)],
+        # skewed so a few customers are VIP and the long tail spreads over the lower segments
+        "CUSTOMER_ID": np.minimum(rng.zipf(1.6, size=rows), 44),
+        "PRODUCT_ID": rng.integers(1, 13, size=rows),
+        "ORDER_DATE": [date.strftime(DATE_FORMATS[f]) for date, f in zip(dates, formats)],
+        "AMOUNT": amount,
+        "QUANTITY": rng.integers(1, 5, size=rows),
+        "DISCOUNT": rng.uniform(0, 30, size=rows).round(1),
+        "PROFIT": (amount * 0.2).round(2),
+    })
+    sales.loc[sales.sample(frac=0.01, random_state=seed).index, "DISCOUNT"] = np.nan
+
+    customers = pd.DataFrame({
+        "CUSTOMER_ID": np.arange(1, 51),
+        "NAME": [f"customer {i}" for i in range(1, 51)],
+        "EMAIL": [f"c{i}@example.com" for i in range(1, 51)],
+        "SIGNUP_DATE": [f"2025-{i % 12 + 1:02d}-15" for i in range(1, 51)],
+    })
+    products = pd.DataFrame({
+        "PRODUCT_ID": np.arange(1, 11),
+        "PRODUCT_NAME": [f"product {i}" for i in range(1, 11)],
+        "CATEGORY": ["a", "b"] * 5,
+        "PRICE": np.linspace(1.0, 10.0, 10),
+    })
+    return sales, customers, products
+
+
+def through_xcom(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    JSON round trip of the DAG tasks, the dates come back as ISO strings
+    """
+    return pd.read_json(io.StringIO(df.to_json(orient="split", date_format="iso")), orient="split")
+
+
+def run_pipeline(engine_name: str, sales, customers, products, quarantine: bool = False, xcom: bool = False) -> dict:
+    engine = get_engine(engine_name)
+    quarantines = {name: Quarantine(name, max_reject_ratio=0.5) if quarantine else None
+                   for name in ("sales", "customers", "products")}
+    passed = through_xcom if xcom else pd.DataFrame.copy
+
+    sales = engine.clean_sales_data(sales.copy(), quarantine=quarantines["sales"])
+    customers = engine.clean_customers_data(customers.copy(), quarantine=quarantines["customers"])
+    products = engine.clean_products_data(products.copy(), quarantine=quarantines["products"])
+    merged = engine.merge_data(sales_df=passed(sales), customers_df=passed(customers), products_df=passed(products))
+
+    outputs = {
+        "sales": sales,
+        "customers": customers,
+        "products": products,
+        "merged": merged,
+        "aggregates": engine.compute_monthly_aggregates(passed(merged)),
+        "segments": engine.segment_customers(passed(sales), passed(customers)),
+        "anomalies": engine.detect_sales_anomalies(passed(sales)),
+        "forecast": engine.forecast_sales(passed(sales)),
+    }
+    if quarantine:
+        outputs["sales_rejects"] = quarantines["sales"].to_frame().drop(columns="rejected_at")
+    return outputs
+
+
+@pytest.mark.parametrize("xcom", [False, True], ids=["frames", "xcom"])
+@pytest.mark.parametrize("quarantine", [False, True], ids=["dropna", "quarantine"])
+@pytest.mark.parametrize("engine_name", ENGINES[1:])
+def test_engines_return_identical_frames(engine_name, quarantine, xcom):
+    """
+    test if the engine returns the same frames as the pandas engine at every stage, also when the analytics read
+    their inputs back from XCom JSON like in the DAG
+    """
+    raw = make_raw_frames(2000)
+
+    expected = run_pipeline("pandas", *raw, quarantine=quarantine, xcom=xcom)
+    actual = run_pipeline(engine_name, *raw, quarantine=quarantine, xcom=xcom)
+
+    for name, expected_df in expected.items():
+        pd.testing.assert_frame_equal(actual[name].reset_index(drop=True), expected_df.reset_index(drop=True),
+                                      obj=name)
+
+
+def test_fixture_covers_the_edge_cases():
+    """
+    test if the parity fixture actually hits the empty month, dropped customers, join drops and anomalies
+    """
+    outputs = run_pipeline("pandas", *make_raw_frames(2000))
+
+    march = outputs["aggregates"][outputs["aggregates"]["order_date"] == pd.Timestamp("2026-03-31")]
+    assert march[["total_sales", "unique_customers"]].values.tolist() == [[0.0, 0]]
+    assert len(outputs["segments"]) < len(outputs["customers"])
+    assert len(outputs["merged"]) < len(outputs["sales"]) < 2000
+    assert set(outputs["segments"]["customer_segment"]) >= {"Medium", "High", "VIP"}
+    assert not outputs["anomalies"].empty
+
+
+def test_unknown_engine():
+    with pytest.raises(ValueError):
+        get_engine("spark")
+
+
+@pytest.mark.skipif(not BENCHMARK_ROWS, reason="set ENGINE_BENCHMARK_ROWS to run the engine benchmark")
+def test_engine_benchmark():
+    """
+    time every stage under every engine on ENGINE_BENCHMARK_ROWS sales rows, side by side. The analytics read
+    their inputs back from XCom JSON like in the DAG
+    """
+    raw = make_raw_frames(BENCHMARK_ROWS)
+    timings = {}
+    for engine_name in ENGINES:
+        engine = get_engine(engine_name)
+        sales, customers, products = (df.copy() for df in raw)
+        stages = [
+            ("clean_sales_data", lambda: engine.clean_sales_data(sales)),
+            ("clean_customers_data", lambda: engine.clean_customers_data(customers)),
+            ("clean_products_data", lambda: engine.clean_products_data(products)),
+        ]
+        results = {}
+        for stage, run in stages:
+            started = time.perf_counter()
+            results[stage] = run()
+            timings[(stage, engine_name)] = time.perf_counter() - started
+
+        clean_sales, clean_customers, clean_products = (
+            through_xcom(results[stage]) for stage in ("clean_sales_data", "clean_customers_data", "clean_products_data")
+        )
+        analytics = [
+            ("merge_data", lambda: engine.merge_data(clean_sales, clean_customers, clean_products)),
+            ("segment_customers", lambda: engine.segment_customers(clean_sales.copy(), clean_customers)),
+            ("detect_sales_anomalies", lambda: engine.detect_sales_anomalies(clean_sales.copy())),
+            ("forecast_sales", lambda: engine.forecast_sales(clean_sales.copy())),
+        ]
+        for stage, run in analytics:
+            started = time.perf_counter()
+            results[stage] = run()
+            timings[(stage, engine_name)] = time.perf_counter() - started
+
+        merged = through_xcom(results["merge_data"])
+        started = time.perf_counter()
+        engine.compute_monthly_aggregates(merged)
+        timings[("compute_monthly_aggregates", engine_name)] = time.perf_counter() - started
+
+    report = pd.Series(timings).unstack()[ENGINES]
+    for engine_name in ENGINES[1:]:
+        report[f"{engine_name}_speedup"] = report["pandas"] / report[engine_name]
+    print(f"\nEngine benchmark on {BENCHMARK_ROWS} sales rows (seconds):\n{report.round(3).to_string()}")
@@ -0,0 +1,57 @@
+"""Tests for the lineage ledger and the per-run reconciliation report."""
+
+import time
+
+import pandas as pd
+
+from include.etl.lineage import LineageLedger, build_report, column_checksums, reconcile
+from include.etl.transform import merge_data
+
+
+def make_frames():
+    sales = pd.DataFrame({
+        "order_id": ["O1", "O2", "O3", "O4"],
+        "customer_id": ["C1", "C2", "C9", "C1"],
+        "product_id": ["P1", "P1", "P1", "P9"],
+        "total_revenue": [10.0, 20.0, 30.0, 40.0],
+    })
+    customers = pd.DataFrame({"customer_id": ["C1", "C2"], "name": ["Ann", "Bob"]})
+    products = pd.DataFrame({"product_id": ["P1"], "profit": [1.0]})
+    return sales, customers, products
+
+
+def test_merge_records_join_drops():
+    """
+    test if the sales rows without a matching customer or product are counted as join drops
+    """
+    ledger = LineageLedger()
+    merged = merge_data(*make_frames(), ledger=ledger)
+
+    entry = ledger.entries[0]
+    assert entry["stage"] == "merge_data"
+    assert (entry["input_rows"], entry["output_rows"], entry["join_dropped"]) == (4, len(merged), 2)
+    assert set(entry["column_checksums"]) == set(merged.columns)
+
+
+def test_column_checksums_ignore_row_order():
+    sales, _, _ = make_frames()
+
+    assert column_checksums(sales) == column_checksums(sales.iloc[::-1])
+    assert column_checksums(sales) != column_checksums(sales.assign(total_revenue=[10.0, 20.0, 30.0, 41.0]))
+
+
+def test_reconcile_flags_unexplained_row_loss():
+    """
+    test if only the row-level stage that lost rows without a counted reason is reported
+    """
+    ledger = LineageLedger(checksums=False)
+    frame = pd.DataFrame({"a": range(5)})
+    ledger.record("clean_sales_data", 6, frame, time.perf_counter(), null_dropped=1)
+    ledger.record("forecast_sales", 8, frame, time.perf_counter())
+    ledger.record("compute_monthly_aggregates", 100, frame, time.perf_counter(), aggregated=True)
+
+    report = build_report({"transform.transform_sales_data": ledger.entries}, run_id="manual__1")
+
+    assert len(report) == 3
+    assert report["run_id"].unique().tolist() == ["manual__1"]
+    assert reconcile(report)["stage"].tolist() == ["forecast_sales"]
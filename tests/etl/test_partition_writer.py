@@ -0,0 +1,92 @@
+"""Tests for the partition-aware presentation_layer writer, with SQLite standing in for Snowflake."""
+
+import pandas as pd
+import pytest
+import sqlalchemy as sa
+
+from include.etl.partition_writer import month_fingerprints, write_changed_partitions
+
+
+@pytest.fixture
+def engine(tmp_path):
+    return sa.create_engine(f"sqlite:///{tmp_path / 'warehouse.db'}")
+
+
+def make_forecast(revenues):
+    dates = pd.to_datetime(["2026-01-10", "2026-01-20", "2026-02-05", "2026-03-01"])
+    return pd.DataFrame({
+        "order_date": dates[:len(revenues)].strftime("%Y-%m-%dT%H:%M:%S.000"),
+        "total_revenue": revenues,
+        "sales_forecast": revenues,
+    })
+
+
+def read_table(engine, table):
+    df = pd.read_sql(f"SELECT * FROM {table}", engine, parse_dates=["order_date"])
+    return df.sort_values("order_date").reset_index(drop=True)
+
+
+def test_month_fingerprints_ignore_row_order():
+    forecast = make_forecast([1.0, 2.0, 3.0])
+    shuffled = forecast.iloc[[2, 0, 1]]
+
+    pd.testing.assert_frame_equal(month_fingerprints(forecast, "order_date"), month_fingerprints(shuffled, "order_date"))
+
+
+def test_first_write_creates_table_and_manifest(engine):
+    changed = write_changed_partitions(make_forecast([1.0, 2.0, 3.0]), engine, "monthly_sales_forecast", "order_date")
+
+    assert changed == ["2026-01", "2026-02"]
+    assert len(read_table(engine, "monthly_sales_forecast")) == 3
+    assert len(pd.read_sql("SELECT * FROM monthly_sales_forecast_partitions", engine)) == 2
+
+
+def test_only_changed_months_are_rewritten(engine):
+    """
+    test if an unchanged month is skipped, a changed one rewritten, a new one added and a vanished one removed
+    """
+    write_changed_partitions(make_forecast([1.0, 2.0, 3.0]), engine, "monthly_sales_forecast", "order_date")
+
+    assert write_changed_partitions(make_forecast([1.0, 2.0, 3.0]), engine, "monthly_sales_forecast",
+                                    "order_date") == []
+
+    update = make_forecast([1.0, 2.0, 30.0, 4.0])
+    changed = write_changed_partitions(update, engine, "monthly_sales_forecast", "order_date")
+
+    assert changed == ["2026-02", "2026-03"]
+    stored = read_table(engine, "monthly_sales_forecast")
+    assert stored["total_revenue"].tolist() == [1.0, 2.0, 30.0, 4.0]
+
+    changed = write_changed_partitions(update.iloc[2:], engine, "monthly_sales_forecast", "order_date")
+
+    assert changed == ["2026-01"]
+    assert read_table(engine, "monthly_sales_forecast")["total_revenue"].tolist() == [30.0, 4.0]
+    assert sorted(pd.read_sql("SELECT month FROM monthly_sales_forecast_partitions", engine)["month"]) == \
+        ["2026-02", "2026-03"]
+
+
+def test_manifest_is_checked_against_the_table(engine):
+    """
+    test if rows deleted from the table outside the writer make it rewrite every month instead of trusting the manifest
+    """
+    write_changed_partitions(make_forecast([1.0, 2.0, 3.0]), engine, "monthly_sales_forecast", "order_date")
+    with engine.begin() as conn:
+        conn.execute(sa.text("DELETE FROM monthly_sales_forecast WHERE total_revenue = 2.0"))
+
+    changed = write_changed_partitions(make_forecast([1.0, 2.0, 3.0]), engine, "monthly_sales_forecast", "order_date")
+
+    assert changed == ["2026-01", "2026-02"]
+    assert read_table(engine, "monthly_sales_forecast")["total_revenue"].tolist() == [1.0, 2.0, 3.0]
+
+
+def test_failed_write_rolls_back(engine, monkeypatch):
+    write_changed_partitions(make_forecast([1.0, 2.0, 3.0]), engine, "monthly_sales_forecast", "order_date")
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("insert failed")
+
+    monkeypatch.setattr(pd.DataFrame, "to_sql", fail)
+    with pytest.raises(RuntimeError):
+        write_changed_partitions(make_forecast([5.0, 2.0, 3.0]), engine, "monthly_sales_forecast", "order_date")
+
+    assert read_table(engine, "monthly_sales_forecast")["total_revenue"].tolist() == [1.0, 2.0, 3.0]
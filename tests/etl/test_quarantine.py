@@ -0,0 +1,104 @@
+"""Tests for the row-level quarantine of the clean_* transforms."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from include.etl.quarantine import Quarantine
+from include.etl.transform import clean_customers_data, clean_sales_data
+
+
+def make_sales():
+    return pd.DataFrame({
+        "Order ID": ["A", "B", "C", "D", "E"],
+        "Customer ID": [1, 2, 3, 4, 5],
+        "Product ID": [1, 1, 2, 2, 3],
+        "Order Date": ["2026-01-01", "2026-01-02", "not a date", "2026-01-04", "2026-01-05"],
+        "Amount": [10.0, 20.0, 30.0, -5.0, 50.0],
+        "Quantity": [1, 2, 3, 4, 5],
+        "Discount": [0.0, 5.0, 0.0, 0.0, 10.0],
+        "Profit": [1.0, np.nan, 3.0, 4.0, 5.0],
+    })
+
+
+def test_clean_sales_quarantines_bad_rows():
+    """
+    test if null, unparseable date and failed check rows are rejected with a reason and the rest continues
+    """
+    quarantine = Quarantine("sales", max_reject_ratio=1.0)
+
+    cleaned = clean_sales_data(make_sales(), quarantine=quarantine)
+
+    assert cleaned["order_id"].tolist() == ["A", "E"]
+    rejects = quarantine.to_frame().set_index("order_id")
+    assert rejects.loc["B", "reject_reason"] == "null:profit"
+    assert rejects.loc["C", "reject_reason"] == "coerce:order_date"
+    assert rejects.loc["C", "order_date"] == "not a date"
+    assert rejects.loc["D", "reject_reason"].startswith("schema:")
+    assert (rejects["dataset"] == "sales").all()
+
+
+def test_null_in_int_column_is_quarantined():
+    """
+    test if a null in an int column is rejected by row and the remaining rows are cast back to the post-schema dtypes
+    """
+    sales = make_sales().drop(index=[2, 3])
+    sales["Customer ID"] = [1, np.nan, 5]
+    customers = pd.DataFrame({
+        "Customer ID": [1, np.nan, 3],
+        "Name": ["Ann", "Bob", "Cid"],
+        "Email": ["ann@example.com", "bob@example.com", "cid@example.com"],
+        "Signup Date": ["2025-01-01", "2025-01-02", "2025-01-03"],
+    })
+    sales_quarantine = Quarantine("sales", max_reject_ratio=1.0)
+    customers_quarantine = Quarantine("customers", max_reject_ratio=1.0)
+
+    cleaned_sales = clean_sales_data(sales, quarantine=sales_quarantine)
+    cleaned_customers = clean_customers_data(customers, quarantine=customers_quarantine)
+
+    assert cleaned_sales["order_id"].tolist() == ["A", "E"]
+    assert cleaned_sales["customer_id"].dtype == "int64"
+    assert cleaned_customers["customer_id"].tolist() == [1, 3]
+    assert cleaned_customers["customer_id"].dtype == "int64"
+    assert customers_quarantine.to_frame()["reject_reason"].tolist() == ["null:customer_id"]
+
+
+def test_fractional_quantity_is_quarantined():
+    """
+    test if a fractional value in an int column is rejected instead of being truncated by the cast
+    """
+    sales = make_sales().drop(index=[2, 3])
+    sales["Profit"] = 1.0
+    sales["Quantity"] = [1.0, 1.5, 3.0]
+    quarantine = Quarantine("sales", max_reject_ratio=1.0)
+
+    cleaned = clean_sales_data(sales, quarantine=quarantine)
+
+    assert cleaned["order_id"].tolist() == ["A", "E"]
+    assert cleaned["quantity"].tolist() == [1, 3]
+    assert cleaned["quantity"].dtype == "int64"
+    assert quarantine.to_frame()["reject_reason"].tolist() == ["schema:quantity:integral"]
+
+
+def test_clean_sales_fails_above_reject_ratio():
+    """
+    test if the run still fails when the rejected share is above the threshold
+    """
+    with pytest.raises(ValueError, match="above the 10.00% threshold"):
+        clean_sales_data(make_sales(), quarantine=Quarantine("sales", max_reject_ratio=0.1))
+
+
+def test_clean_sales_without_quarantine_drops_nulls():
+    """
+    test if the default path keeps the old dropna behaviour
+    """
+    sales = make_sales().drop(index=[2, 3])
+
+    cleaned = clean_sales_data(sales)
+
+    assert cleaned["order_id"].tolist() == ["A", "E"]
+
+
+def test_from_config_disabled():
+    assert Quarantine.from_config("sales", {"enabled": False}) is None
+    assert Quarantine.from_config("sales", {"enabled": True, "max_reject_ratio": 0.2}).max_reject_ratio == 0.2
@@ -0,0 +1,101 @@
+"""Tests for the memory estimate and pool/queue routing of the ETL tasks."""
+
+import importlib.util
+from pathlib import Path
+from types import SimpleNamespace
+
+import pandas as pd
+from airflow.models import DagBag
+
+from include.etl.sizing import RESOURCE_PLAN_CONF_KEY, TASK_PROFILES, chunk_rows_for_frame, plan_resources, \
+    record_dataset_stats, task_resources
+
+LOCAL_SETTINGS_PATH = Path(__file__).resolve().parents[2] / "config" / "airflow_local_settings.py"
+PIPELINE_DAG_PATH = Path(__file__).resolve().parents[2] / "dags" / "etl_pipeline_dag.py"
+
+GIB = 1024 ** 3
+
+SIZING_CONFIG = {
+    "default_memory_per_file_byte": 5,
+    "chunked_above_bytes": 4 * GIB,
+    "chunk_rows": 1000,
+    "tiers": [
+        {"name": "small", "max_bytes": GIB, "pool": "default_pool", "pool_slots": 1, "queue": "default"},
+        {"name": "large", "pool": "high_memory", "pool_slots": 4, "queue": "high_memory"},
+    ],
+}
+
+
+def test_plan_routes_big_sales_tasks_to_the_large_tier():
+    """
+    test if a 5 GB sales file goes to the large tier while the products task stays small
+    """
+    object_sizes = {"folder/sales.csv": 5 * 10 ** 9, "folder/products.csv": 10 ** 4, "folder/customers.csv": 10 ** 5}
+
+    plan = plan_resources(object_sizes, history={}, sizing_config=SIZING_CONFIG)
+
+    assert plan["tasks"]["transform_sales_data"]["tier"] == "large"
+    assert plan["tasks"]["transform_product_file"]["tier"] == "small"
+    assert plan["tasks"]["load_cleaned_sales"]["tier"] == "large"
+    assert plan["tasks"]["load_cleaned_products"]["tier"] == "small"
+    assert task_resources(plan, "transform_sales_data", SIZING_CONFIG) == {
+        "pool": "high_memory", "pool_slots": 4, "queue": "high_memory",
+    }
+    assert task_resources(plan, "transform_product_file", SIZING_CONFIG) == {
+        "pool": "default_pool", "pool_slots": 1, "queue": "default",
+    }
+
+
+def test_recorded_history_drives_the_estimate():
+    """
+    test if the bytes-per-row recorded from a run replace the flat default on the next plan
+    """
+    files = {"folder/sales.csv": pd.DataFrame({"order_id": ["A"] * 100, "amount": [1.0] * 100})}
+    history = record_dataset_stats({}, files, {"sales": 10_000, "customers": 0, "products": 0})
+
+    assert history["sales"]["file_bytes_per_row"] == 100
+    plan = plan_resources({"folder/sales.csv": 20_000}, history=history, sizing_config=SIZING_CONFIG)
+    assert plan["dataset_memory_bytes"]["sales"] == int(200 * history["sales"]["memory_bytes_per_row"])
+
+
+def test_every_pipeline_task_has_a_profile():
+    """
+    test if TASK_PROFILES names exactly the tasks of etl_pipeline_dag, the hook matches on the last task_id segment
+    """
+    dag_bag = DagBag(dag_folder=str(PIPELINE_DAG_PATH), include_examples=False)
+    assert not dag_bag.import_errors, dag_bag.import_errors
+
+    task_names = {task_id.rsplit(".", 1)[-1] for task_id in dag_bag.get_dag("etl_pipeline_dag").task_ids}
+
+    assert task_names == set(TASK_PROFILES)
+
+
+def test_no_plan_means_airflow_defaults():
+    assert task_resources({}, "transform_sales_data", SIZING_CONFIG) == {}
+
+
+def test_loads_batch_only_big_frames():
+    frame = pd.DataFrame({"amount": [1.0] * 100})
+
+    assert chunk_rows_for_frame(frame, SIZING_CONFIG) is None
+    assert chunk_rows_for_frame(frame, dict(SIZING_CONFIG, chunked_above_bytes=100)) == 1000
+
+
+def test_mutation_hook_applies_the_run_plan():
+    """
+    test if the mutation hook routes a task instance with the plan passed in its own run's conf
+    """
+    spec = importlib.util.spec_from_file_location("airflow_local_settings", LOCAL_SETTINGS_PATH)
+    local_settings = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(local_settings)
+    plan = plan_resources({"folder/sales.csv": 5 * 10 ** 9}, history={}, sizing_config=SIZING_CONFIG)
+    dag_run = SimpleNamespace(conf={RESOURCE_PLAN_CONF_KEY: plan})
+
+    sales = SimpleNamespace(task_id="transform.transform_sales_data", pool="default_pool", pool_slots=1)
+    products = SimpleNamespace(task_id="loading.load_cleaned_products", pool="default_pool", pool_slots=1)
+    local_settings.task_instance_mutation_hook(sales, dag_run=dag_run)
+    local_settings.task_instance_mutation_hook(products, dag_run=dag_run)
+    local_settings.task_instance_mutation_hook(products, dag_run=SimpleNamespace(conf={}))
+
+    assert (sales.pool, sales.pool_slots, sales.queue) == ("high_memory", 4, "high_memory")
+    assert (products.pool, products.pool_slots, products.queue) == ("default_pool", 1, "default")
@@ -0,0 +1,44 @@
+"""Tests for the DuckDB session behind the SQL analytics engine."""
+
+import pandas as pd
+import pyarrow as pa
+
+from include.etl.transform_duckdb import DuckDBSession, configure, forecast_sales, run_query
+
+
+def make_sales():
+    return pd.DataFrame({
+        "order_id": [f"O{i}" for i in range(10)],
+        "customer_id": [1, 2] * 5,
+        "product_id": [1] * 10,
+        "order_date": pd.date_range("2026-01-25", periods=10, freq="D"),
+        "total_revenue": [float(i) for i in range(10, 0, -1)],
+    })
+
+
+def test_parquet_and_frame_sources_give_the_same_result(tmp_path):
+    """
+    test if a Parquet file registers with the same rows, row order and query result as the in-memory frame
+    """
+    sales = make_sales()
+    sales.to_parquet(tmp_path / "sales.parquet", index=False)
+
+    from_frame = run_query("sales_forecast", {"sales": sales})
+    from_parquet = run_query("sales_forecast", {"sales": str(tmp_path / "sales.parquet")})
+
+    assert isinstance(from_frame, pa.Table)
+    assert from_frame.equals(from_parquet)
+    assert from_frame.column("sales_forecast").to_pylist()[:2] == [10.0, 9.5]
+
+
+def test_spill_settings_are_applied(tmp_path):
+    configure({"memory_limit": "256MB", "temp_directory": str(tmp_path / "spill"), "threads": 2})
+    try:
+        with DuckDBSession.from_settings() as session:
+            settings = session.connection.sql(
+                "SELECT current_setting('temp_directory'), current_setting('threads')"
+            ).fetchone()
+        assert settings == (str(tmp_path / "spill"), 2)
+        assert not forecast_sales(make_sales()).empty
+    finally:
+        configure(None)